@@ -1,8 +1,12 @@
-import yfinance as yf
 import pandas as pd
 import os
 import time
+import argparse
 from datetime import datetime, time as dt_time
+import fiyat_deposu
+import indikator_durumu
+import indirici
+import temel_veri
 
 # --- BULUT UYUMLU AYARLAR ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -30,12 +34,29 @@ hisseler = [
     "XU100", "XBLSM", "XTCRT", "XSGRT", "XGIDA", "XKMYA", "XTEKS", "XK100"
 ]
 
-def main():
+# Artımlı modda son kaç bar yeniden istenir (revizyon / bölünme kontrolü için)
+OVERLAP_BARS = 5
+
+def prepare_history(df, bugun, piyasa_kapali_mi):
+    """yfinance çıktısını depo sütunlarına çevirir, piyasa açıksa bugünkü yarım mumu atar."""
+    df = df.reset_index()
+    df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None) # Saat dilimini temizle
+    
+    df.rename(columns={'Date': 'DATE', 'Open': 'OPEN_TL', 'High': 'HIGH_TL', 
+                       'Low': 'LOW_TL', 'Close': 'CLOSING_TL', 'Volume': 'VOLUME_TL'}, inplace=True)
+    
+    # Son mum kontrolü
+    if not df.empty:
+        son_tarih = df['DATE'].iloc[-1].date()
+        if son_tarih == bugun and not piyasa_kapali_mi:
+            df = df[:-1]
+    return df
+
+def main(export_xlsx=False, full_refresh=False, workers=indirici.DEFAULT_WORKERS, rate=indirici.DEFAULT_RATE, skip_temel=False):
     print("--- VERİ İNDİRME + TEMEL ANALİZ (10 Yıllık) ---")
     
     basarili = 0
-    total = len(hisseler)
-    temel_veriler = [] # F/K, PD/DD verilerini tutacak liste
+    sayac = {'appended': 0, 'unchanged': 0, 'full': 0}
     
     bugun = datetime.now().date()
     su_an = datetime.now().time()
@@ -43,82 +64,92 @@ def main():
     piyasa_kapali_mi = su_an > piyasa_kapanis_saati
     
     print(f"Piyasa Durumu: {'KAPALI (Son Veri Dahil)' if piyasa_kapali_mi else 'AÇIK (Son Veri Silinecek)'}")
+    print(f"Mod: {'TAM YENİLEME (10 Yıl)' if full_refresh else 'ARTIMLI (Sadece Eksik Günler)'}")
+
+    # 1. HANGİ ARALIK İSTENECEK?
+    # Depoda veri varsa son OVERLAP_BARS bardan itibaren iste, yoksa 10 yıl
+    jobs = []
+    for sembol in hisseler:
+        stored = None if full_refresh else fiyat_deposu.load_array(sembol.replace('.IN',''), TARGET_FOLDER)
+        baslangic = None
+        if stored is not None and stored['DATE'].shape[0] > OVERLAP_BARS:
+            baslangic = pd.Timestamp(stored['DATE'][-OVERLAP_BARS]).date()
+        jobs.append((sembol, indirici.yahoo_symbol(sembol), baslangic))
 
-    for i, sembol in enumerate(hisseler):
+    # 2. GEÇMİŞ VERİ (MUM) ÇEKME - paralel, hız sınırlı
+    downloader = indirici.Downloader(workers=workers, rate=rate)
+    data, _ = downloader.download_many(jobs)  # indirme hataları burada raporlanır
+    hatalar = {}
+
+    # 3. KAYDETME İŞLEMLERİ
+    revize = []
+    for sembol, yf_sembol, baslangic in jobs:
+        if sembol not in data: continue
+        hisse = sembol.replace('.IN','')
         try:
-            # Sembol Ayarı
-            if sembol == "ALTIN.IN": yf_sembol = "GC=F"
-            elif sembol.startswith("X"): yf_sembol = f"{sembol}.IS"
-            elif sembol in ["GLDTR", "GMSTR"]: yf_sembol = f"{sembol}.IS"
-            else: yf_sembol = f"{sembol}.IS"
-            
-            # 1. GEÇMİŞ VERİ (MUM) ÇEKME
-            ticker = yf.Ticker(yf_sembol)
-            df = ticker.history(period="10y", interval="1d", auto_adjust=True)
-            
+            df = data[sembol]
             if df.empty:
-                print(f"❌ {sembol}: Veri boş.")
+                hatalar[sembol] = "Veri boş"
                 continue
             
-            # 2. TEMEL ANALİZ VERİSİ ÇEKME (Info)
-            try:
-                info = ticker.info
-                # Verileri güvenli çek (yoksa 0 veya Tire koy)
-                fk = info.get('trailingPE', 0)
-                pddd = info.get('priceToBook', 0)
-                sector = info.get('sector', 'Diğer')
-                market_cap = info.get('marketCap', 0)
-                daily_change = 0
-                
-                # Son gün kapanış ve değişim
-                if len(df) >= 2:
-                    close_now = df['Close'].iloc[-1]
-                    close_prev = df['Close'].iloc[-2]
-                    daily_change = ((close_now - close_prev) / close_prev) * 100
-                
-                temel_veriler.append({
-                    'Hisse': sembol,
-                    'Fiyat': round(df['Close'].iloc[-1], 2),
-                    'FK': round(fk, 2) if fk else 0,
-                    'PD_DD': round(pddd, 2) if pddd else 0,
-                    'Sektor': sector,
-                    'Piyasa_Degeri': market_cap,
-                    'Degisim_Yuzde': round(daily_change, 2)
-                })
-            except:
-                pass # Temel veri yoksa da devam et
-
-            # 3. KAYDETME İŞLEMLERİ
-            df.reset_index(inplace=True)
-            df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None) # Saat dilimini temizle
-            
-            df.rename(columns={'Date': 'DATE', 'Open': 'OPEN_TL', 'High': 'HIGH_TL', 
-                               'Low': 'LOW_TL', 'Close': 'CLOSING_TL', 'Volume': 'VOLUME_TL'}, inplace=True)
+            df = prepare_history(df, bugun, piyasa_kapali_mi)
             
-            # Son mum kontrolü
-            if not df.empty:
-                son_tarih = df['DATE'].iloc[-1].date()
-                if son_tarih == bugun and not piyasa_kapali_mi:
-                    df = df[:-1]
-            
-            filename = os.path.join(TARGET_FOLDER, f"{sembol.replace('.IN','')}.xlsx")
-            df.to_excel(filename, index=False)
+            # Ana kayıt sütunsal .npy depoya; xlsx sadece istenirse (--xlsx)
+            durum = 'full'
+            if baslangic is not None:
+                durum = fiyat_deposu.append_array(hisse, fiyat_deposu.frame_to_array(df), TARGET_FOLDER)
+                if durum == 'revised':
+                    # Örtüşen eski barlar değişmiş (bölünme/temettü): 10 yılı baştan al
+                    revize.append((sembol, yf_sembol, None))
+                    continue
+            if durum == 'full':
+                fiyat_deposu.save_prices(hisse, df, TARGET_FOLDER)
+                indikator_durumu.invalidate(hisse, TARGET_FOLDER)
+            if export_xlsx: fiyat_deposu.export_xlsx_file(hisse, TARGET_FOLDER)
+            sayac[durum] += 1
             basarili += 1
-            
-            if i % 10 == 0: print(f"⬇️ {sembol} işlendi... ({i}/{total})")
-                
         except Exception as e:
-            continue
+            hatalar[sembol] = f"Kayıt hatası: {e}"
 
-    # --- TEMEL VERİLERİ ÖZET OLARAK KAYDET ---
-    if temel_veriler:
-        df_temel = pd.DataFrame(temel_veriler)
-        summary_path = os.path.join(TARGET_FOLDER, "TEMEL_VERILER.xlsx")
-        df_temel.to_excel(summary_path, index=False)
-        print(f"📊 Temel Analiz Dosyası Oluşturuldu: {summary_path}")
+    # 4. REVİZE EDİLENLER: tam yenileme
+    if revize:
+        print(f"🔁 {len(revize)} sembolde geçmiş veri revize edilmiş, tam yenileniyor: {', '.join(r[0] for r in revize)}")
+        data, hatalar_r = downloader.download_many(revize, verbose=False)
+        hatalar.update(hatalar_r)
+        for sembol, _, _ in revize:
+            if sembol not in data: continue
+            try:
+                hisse = sembol.replace('.IN','')
+                fiyat_deposu.save_prices(hisse, prepare_history(data[sembol], bugun, piyasa_kapali_mi), TARGET_FOLDER)
+                indikator_durumu.invalidate(hisse, TARGET_FOLDER)
+                if export_xlsx: fiyat_deposu.export_xlsx_file(hisse, TARGET_FOLDER)
+                sayac['full'] += 1
+                basarili += 1
+            except Exception as e:
+                hatalar[sembol] = f"Kayıt hatası: {e}"
+
+    # --- TEMEL VERİLER (ayrı aşama) ---
+    # ticker.info kendi önbelleğinden gelir; sadece süresi dolanlar paralel yenilenir.
+    # FK, PD/DD, piyasa değeri güncel kapanıştan hesaplanır.
+    if not skip_temel:
+        temel_hisseler = [s.replace('.IN','') for s in hisseler]
+        try:
+            temel_veri.refresh(temel_hisseler, TARGET_FOLDER)
+            summary_path = temel_veri.export_xlsx(TARGET_FOLDER, temel_hisseler)
+            if summary_path: print(f"📊 Temel Analiz Dosyası Oluşturuldu: {summary_path}")
+        except Exception as e:
+            print(f"⚠️ Temel veri güncellenemedi: {e}")
 
     print("-" * 30)
-    print(f"✅ İŞLEM TAMAMLANDI. Başarılı: {basarili}")
+    for sembol, hata in sorted(hatalar.items()): print(f"❌ {sembol}: {hata}")
+    print(f"✅ İŞLEM TAMAMLANDI. Başarılı: {basarili} (Eklenen: {sayac['appended']}, Değişmeyen: {sayac['unchanged']}, Tam Yenilenen: {sayac['full']})")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Yahoo veri indirme + temel analiz")
+    parser.add_argument("--xlsx", action="store_true", help="Her hisse için .xlsx dışa aktarımı da yaz")
+    parser.add_argument("--full", action="store_true", help="Artımlı yerine 10 yılı baştan indir")
+    parser.add_argument("--workers", type=int, default=indirici.DEFAULT_WORKERS, help="Paralel indirme iş parçacığı sayısı")
+    parser.add_argument("--rate", type=float, default=indirici.DEFAULT_RATE, help="Saniyedeki en fazla istek")
+    parser.add_argument("--skip-temel", action="store_true", help="Temel veri (F/K, PD/DD) aşamasını atla")
+    args = parser.parse_args()
+    main(export_xlsx=args.xlsx, full_refresh=args.full, workers=args.workers, rate=args.rate, skip_temel=args.skip_temel)
@@ -0,0 +1,358 @@
+import os
+import time
+import pickle
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from fiyat_deposu import list_symbols
+from yukleyici import load_stock_df, source_path
+import indikatorler
+from indikator_onbellek import hull as calculate_hull, tema as calculate_custom_tema, rsi as calculate_rsi
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- BACKTEST MOTORU ---
+# Hisse Lab'ın (borsa_panel) tek pozisyonlu, yalnız alış yönlü simülasyonu.
+# Strateji önce tüm seri için giriş/çıkış boole dizilerine çevrilir; pozisyon
+# durumu (nakit / pozisyonda) bu dizilerden vektörel olarak çıkarılır:
+# son olay girişse pozisyondayız, çıkışsa nakitteyiz. Aynı bar hem giriş hem
+# çıkış olamaz (eski döngüde de elif). İlk START barı ısınma, işlem yok.
+START = 100
+STRATEGIES = {
+    "FRM": "FRM (Hull + ATR)",
+    "BUM": "BUM (TEMA Cross)",
+    "TREF": "TREF (Momentum)",
+    "RUA": "RUA (Dip Avcısı)",
+}
+# Stratejilerin (panelde sabit olan) parametreleri; optimizasyon bunları tarar
+DEFAULT_PARAMS = {
+    "FRM": {"hull": 89, "atr": 14},
+    "BUM": {"fast": 34, "slow": 68},
+    "TREF": {"ema": 5, "buy": 50, "sell": 40},
+    "RUA": {"bb": 20, "dev": 2},
+}
+
+
+# ==================== MATEMATİKSEL FONKSİYONLAR ====================
+def calculate_ema(s, p): return s.ewm(span=p, adjust=False).mean()
+def calculate_atr(df, l=14):
+    if 'HIGH_TL' not in df: return df['CLOSING_TL'].diff().abs().ewm(alpha=1/l).mean()
+    tr=pd.concat([df['HIGH_TL']-df['LOW_TL'], (df['HIGH_TL']-df['CLOSING_TL'].shift(1)).abs(), (df['LOW_TL']-df['CLOSING_TL'].shift(1)).abs()], axis=1).max(axis=1)
+    return tr.ewm(alpha=1/l).mean()
+def calculate_mfi(df, p=14):
+    if 'VOLUME_TL' not in df: return calculate_rsi(df['CLOSING_TL'], p)
+    tp=(df['HIGH_TL']+df['LOW_TL']+df['CLOSING_TL'])/3; rmf=tp*df['VOLUME_TL']
+    pos=np.where(tp>tp.shift(1),rmf,0); neg=np.where(tp<tp.shift(1),rmf,0)
+    return (100-(100/(1+pd.Series(pos).rolling(p).sum()/pd.Series(neg).rolling(p).sum()))).fillna(50)
+def calculate_bollinger(s, p=20, d=2): sma=s.rolling(p).mean(); std=s.rolling(p).std(); return sma+(std*d), sma-(std*d)
+
+
+def strategy_key(name):
+    """Paneldeki strateji adından (örn. 'FRM (Hull + ATR)') anahtar; bilinmiyorsa None."""
+    return next((k for k in STRATEGIES if k in name), None)
+
+
+def _prev(a):
+    return np.concatenate(([np.nan], a[:-1]))
+
+
+class IndicatorBank:
+    """Bir hissenin strateji indikatörleri; her (ad, parametre) bir kez hesaplanır.
+    Parametre taramasında TEMA 34, Hull 89 gibi seriler kombinasyonlar arasında
+    paylaşılır. memo=True ise ortak indikatörler indikator_onbellek'ten gelir
+    (panel); optimizasyon binlerce uzunluğu önbelleğe taşımamak için False verir."""
+
+    def __init__(self, df, memo=True):
+        self.df = df
+        self.close = df['CLOSING_TL']
+        self.c = self.close.to_numpy(dtype=float)
+        self._cache = {}
+        if memo: self._hull, self._tema, self._rsi = calculate_hull, calculate_custom_tema, calculate_rsi
+        else: self._hull, self._tema, self._rsi = indikatorler.calculate_hull, indikatorler.calculate_custom_tema, indikatorler.calculate_rsi
+
+    def series(self, name, *params):
+        key = (name,) + params
+        if key not in self._cache: self._cache[key] = self._compute(name, *params)
+        return self._cache[key]
+
+    def values(self, name, *params):
+        key = ("np", name) + params
+        if key not in self._cache: self._cache[key] = self.series(name, *params).to_numpy(dtype=float)
+        return self._cache[key]
+
+    def _compute(self, name, *p):
+        if name == "hull": return self._hull(self.close, *p)
+        if name == "atr": return calculate_atr(self.df, *p)
+        if name == "tema": return self._tema(self.close, *p)
+        if name == "ema": return calculate_ema(self.close, *p)
+        if name == "rua": return (self._rsi(self.close) + calculate_mfi(self.df)) / 2  # TREF ve RUA ortak
+        if name == "rua_mean": return self.series("rua").rolling(p[0]).mean()
+        if name == "rua_std": return self.series("rua").rolling(p[0]).std()
+        raise ValueError(f"Bilinmeyen indikatör: {name}")
+
+
+def strategy_signals(df, strategy, params=None):
+    """Tüm seri için (giriş, çıkış, plot_data). Giriş/çıkış boole dizileridir;
+    karşılaştırmalar NaN'da False olduğu için ısınma barları kendiliğinden elenir.
+    df yerine IndicatorBank verilirse indikatörler kombinasyonlar arasında paylaşılır;
+    params verilmeyen değerler DEFAULT_PARAMS'tan gelir."""
+    bank = df if isinstance(df, IndicatorBank) else IndicatorBank(df)
+    key = strategy_key(strategy)
+    p = dict(DEFAULT_PARAMS.get(key, {}), **(params or {}))
+    c = bank.c
+    n = len(c)
+    entry = exit = np.zeros(n, dtype=bool)
+    plot_data = {}
+    if key == "FRM":
+        plot_data = {'line1': bank.series("hull", p["hull"]), 'name1': f'Hull {p["hull"]}', 'color1': 'orange'}
+        h, a = bank.values("hull", p["hull"]), bank.values("atr", p["atr"])
+        entry = (c > h) & (c > _prev(c) + a)
+        exit = c < h
+    elif key == "BUM":
+        plot_data = {'line1': bank.series("tema", p["fast"]), 'name1': f'TEMA {p["fast"]}', 'color1': 'cyan',
+                     'line2': bank.series("tema", p["slow"]), 'name2': f'TEMA {p["slow"]}', 'color2': 'magenta'}
+        m1, m2 = bank.values("tema", p["fast"]), bank.values("tema", p["slow"])
+        entry = (m1 > m2) & (_prev(m1) <= _prev(m2))
+        exit = m1 < m2
+    elif key == "TREF":
+        plot_data = {'line1': bank.series("ema", p["ema"]), 'name1': f'EMA {p["ema"]}', 'color1': 'yellow'}
+        t, e = bank.values("rua"), bank.values("ema", p["ema"])
+        entry = (t > p["buy"]) & (_prev(t) <= p["buy"]) & (e > _prev(e))
+        exit = t < p["sell"]
+    elif key == "RUA":
+        r, sma, std = bank.values("rua"), bank.values("rua_mean", p["bb"]), bank.values("rua_std", p["bb"])
+        up, low = sma + (std * p["dev"]), sma - (std * p["dev"])
+        entry = (r <= low) | ((_prev(r) < _prev(low)) & (r > low))
+        exit = r >= up
+    return entry, exit & ~entry, plot_data
+
+
+def simulate(close, entry, exit, start=START, end=None):
+    """Pozisyon durum makinesi. (açılış_idx, kapanış_idx, kar_%, özsermaye) döner;
+    kapanış_idx açılıştan bir eksik uzunluktaysa son pozisyon hâlâ açıktır.
+    Özsermaye 100'den başlar ve her kapanan işlemle çarpılır. end verilirse
+    simülasyon o barda (hariç) biter; walk-forward pencereleri için."""
+    c = np.asarray(close, dtype=float)[:end]
+    entry, exit = entry[:end], exit[:end]
+    n = len(c)
+    event = np.zeros(n, dtype=bool)
+    event[start:] = entry[start:] | exit[start:]
+    last = np.maximum.accumulate(np.where(event, np.arange(n), -1))
+    in_pos = np.zeros(n + 1, dtype=np.int8)
+    in_pos[1:] = (last >= 0) & entry[np.maximum(last, 0)]
+    step = np.diff(in_pos)
+    opens, closes = np.flatnonzero(step == 1), np.flatnonzero(step == -1)
+    entry_price = c[opens[:len(closes)]]
+    pnl = ((c[closes] - entry_price) / entry_price) * 100
+    equity = np.cumprod(np.concatenate(([100.0], 1 + pnl / 100)))
+    return opens, closes, pnl, equity
+
+
+def run_backtest(df, strategy_name, start=START):
+    """Panelin beklediği çıktı: (işlemler, özsermaye, sinyaller, plot_data, durum)."""
+    close = df['CLOSING_TL']; date = df['DATE']
+    entry, exit, plot_data = strategy_signals(df, strategy_name)
+    c = close.to_numpy(dtype=float)
+    opens, closes, pnl, equity = simulate(c, entry, exit, start)
+    d_open, d_close = date.iloc[opens].tolist(), date.iloc[closes].tolist()
+    trades = [{'Giriş': d_open[k], 'Çıkış': d_close[k], 'Giriş Fiyat': c[o], 'Çıkış Fiyat': c[x], 'Kar %': pnl[k]}
+              for k, (o, x) in enumerate(zip(opens, closes))]
+    events = sorted([(o, 'buy', d_open[k]) for k, o in enumerate(opens)] + [(x, 'sell', d_close[k]) for k, x in enumerate(closes)])
+    signals = [{'date': d, 'price': c[i], 'type': t} for i, t, d in events]
+    status = "NAKİT"
+    if len(opens) > len(closes):
+        status = "POZİSYONDA (AL)"
+        o = opens[-1]
+        trades.append({'Giriş': d_open[-1], 'Çıkış': 'Devam', 'Giriş Fiyat': c[o], 'Çıkış Fiyat': c[-1],
+                       'Kar %': ((c[-1] - c[o]) / c[o]) * 100})
+    return trades, equity.tolist(), signals, plot_data, status
+
+
+# ==================== EVREN LİDERLİK TABLOSU ====================
+# Tüm hisse x strateji backtest'i. Hisse başına sonuç, fiyat dosyasının
+# (mtime, boyut) damgasıyla DATAson/.backtest_liderlik.pkl'de tutulur; veri
+# değişmeyen hisseler yeniden hesaplanmaz. workers > 1 ise hisseler ardışık
+# dilimlerle süreçlere dağıtılır; her süreç fiyatları .npy'den bellek eşlemeli
+# okur, yani aynı sayfalar işletim sistemi önbelleğinden paylaşılır.
+LEADERBOARD_CACHE = ".backtest_liderlik.pkl"
+LEADERBOARD_COLUMNS = ["Hisse", "Strateji", "Getiri %", "Başarı %", "İşlem", "Maks DD %", "Durum"]
+
+
+def backtest_stats(df, strategy_name, start=START):
+    """Liderlik satırı: getiri (kapanan işlemler, panelle aynı), başarı oranı,
+    işlem sayısı (açık pozisyon dahil), günlük piyasa değerli özsermayeden
+    maksimum düşüş ve güncel durum."""
+    c = df['CLOSING_TL'].to_numpy(dtype=float)
+    entry, exit, _ = strategy_signals(df, strategy_name)
+    opens, closes, pnl, equity = simulate(c, entry, exit, start)
+    open_pnl = ((c[-1] - c[opens[-1]]) / c[opens[-1]]) * 100 if len(opens) > len(closes) else None
+    all_pnl = np.append(pnl, open_pnl) if open_pnl is not None else pnl
+    # Pozisyon, açılış barından sonraki ilk bardan kapanış barına kadar getiri taşır
+    held = np.zeros(len(c) + 1, dtype=np.int32)
+    np.add.at(held, opens + 1, 1); np.add.at(held, closes + 1, -1)
+    held = np.cumsum(held)[:len(c)].astype(bool)
+    ratio = np.ones(len(c))
+    ratio[1:] = np.where(held[1:], c[1:] / c[:-1], 1.0)
+    curve = np.cumprod(ratio)
+    drawdown = (1 - curve / np.maximum.accumulate(curve)).max() * 100
+    return {
+        "Getiri %": equity[-1] - 100,
+        "Başarı %": (all_pnl > 0).mean() * 100 if len(all_pnl) else 0.0,
+        "İşlem": len(all_pnl),
+        "Maks DD %": drawdown,
+        "Durum": "POZİSYONDA (AL)" if open_pnl is not None else "NAKİT",
+    }
+
+
+def _symbol_rows(hisse, data_dir, strategies):
+    df = load_stock_df(hisse, data_dir)
+    if df is None or len(df) <= START: return []
+    return [dict(Hisse=hisse, Strateji=key, **backtest_stats(df, STRATEGIES[key])) for key in strategies]
+
+
+def _leaderboard_chunk(args):
+    symbols, data_dir, strategies = args
+    out = {}
+    for s in symbols:
+        try: out[s] = _symbol_rows(s, data_dir, strategies)
+        except Exception: out[s] = []
+    return out
+
+
+def _stamp(hisse, data_dir):
+    path = source_path(hisse, data_dir)
+    if path is None: return None
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_leaderboard_cache(path):
+    try:
+        with open(path, "rb") as fh: return pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError): return {}
+
+
+def leaderboard(data_dir=DATA_DIR, workers=None, strategies=None, progress=None):
+    """Tüm hisseler x stratejiler için liderlik tablosu (DataFrame, getiriye göre sıralı).
+    Sonuçlar veri değişene kadar diskte önbelleklenir; yalnızca değişen hisseler hesaplanır."""
+    strategies = tuple(strategies or STRATEGIES)
+    workers = workers or os.cpu_count() or 1
+    cache_file = os.path.join(data_dir, LEADERBOARD_CACHE)
+    cache = _load_leaderboard_cache(cache_file)
+    symbols = list_symbols(data_dir)
+    stamps = {s: _stamp(s, data_dir) for s in symbols}
+    stale = [s for s in symbols if cache.get(s, (None, None, None))[:2] != (stamps[s], strategies)]
+
+    if stale:
+        size = -(-len(stale) // workers)
+        chunks = [(stale[i:i + size], data_dir, strategies) for i in range(0, len(stale), size)]
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = pool.map(_leaderboard_chunk, chunks)
+                for n, part in enumerate(parts, 1):
+                    for s, rows in part.items(): cache[s] = (stamps[s], strategies, rows)
+                    if progress: progress(min(n * size, len(stale)), len(stale))
+        else:
+            for n, s in enumerate(stale, 1):
+                cache[s] = (stamps[s], strategies, _leaderboard_chunk(([s], data_dir, strategies))[s])
+                if progress: progress(n, len(stale))
+        cache = {s: cache[s] for s in symbols if s in cache}  # silinen hisseler düşsün
+        tmp = cache_file + ".tmp"
+        with open(tmp, "wb") as fh: pickle.dump(cache, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+
+    rows = [r for s in symbols for r in cache[s][2]]
+    board = pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+    return board.sort_values("Getiri %", ascending=False, ignore_index=True)
+
+
+# ==================== ÖLÇÜM ====================
+def _run_backtest_loop(df, strategy_name):
+    # Eski bar bar .iloc döngüsü; yalnızca karşılaştırma için
+    close = df['CLOSING_TL']; date = df['DATE']
+    trades = []; signals = []; equity = [100]
+    in_pos = False; entry_price = 0; entry_date = None
+    if "FRM" in strategy_name:
+        hull = calculate_hull(close, 89); atr = calculate_atr(df)
+    elif "BUM" in strategy_name:
+        ma1 = calculate_custom_tema(close, 34); ma2 = calculate_custom_tema(close, 68)
+    elif "TREF" in strategy_name:
+        rsi = calculate_rsi(close); mfi = calculate_mfi(df); tref = (rsi+mfi)/2; ema5 = calculate_ema(close, 5)
+    elif "RUA" in strategy_name:
+        rsi = calculate_rsi(close); mfi = calculate_mfi(df); rua = (rsi+mfi)/2
+        bb_up, bb_low = calculate_bollinger(rua)
+    for i in range(100, len(df)):
+        price = close.iloc[i]; dt = date.iloc[i]
+        is_buy = False; is_sell = False
+        if "FRM" in strategy_name:
+            if price > hull.iloc[i] and price > (close.iloc[i-1] + (atr.iloc[i] if atr is not None else 0)): is_buy = True
+            elif price < hull.iloc[i]: is_sell = True
+        elif "BUM" in strategy_name:
+            if ma1.iloc[i] > ma2.iloc[i] and ma1.iloc[i-1] <= ma2.iloc[i-1]: is_buy = True
+            elif ma1.iloc[i] < ma2.iloc[i]: is_sell = True
+        elif "TREF" in strategy_name:
+            if tref.iloc[i] > 50 and tref.iloc[i-1] <= 50 and ema5.iloc[i] > ema5.iloc[i-1]: is_buy = True
+            elif tref.iloc[i] < 40: is_sell = True
+        elif "RUA" in strategy_name:
+            if rua.iloc[i] <= bb_low.iloc[i]: is_buy = True
+            elif rua.iloc[i-1] < bb_low.iloc[i-1] and rua.iloc[i] > bb_low.iloc[i]: is_buy = True
+            elif rua.iloc[i] >= bb_up.iloc[i]: is_sell = True
+        if is_buy and not in_pos:
+            in_pos = True; entry_price = price; entry_date = dt
+            signals.append({'date': dt, 'price': price, 'type': 'buy'})
+        elif is_sell and in_pos:
+            in_pos = False; pnl = ((price - entry_price) / entry_price) * 100
+            trades.append({'Giriş': entry_date, 'Çıkış': dt, 'Giriş Fiyat': entry_price, 'Çıkış Fiyat': price, 'Kar %': pnl})
+            equity.append(equity[-1] * (1 + pnl/100))
+            signals.append({'date': dt, 'price': price, 'type': 'sell'})
+    status = "NAKİT"
+    if in_pos:
+        status = "POZİSYONDA (AL)"
+        trades.append({'Giriş': entry_date, 'Çıkış': 'Devam', 'Giriş Fiyat': entry_price, 'Çıkış Fiyat': close.iloc[-1],
+                       'Kar %': ((close.iloc[-1] - entry_price) / entry_price) * 100})
+    return trades, equity, signals, status
+
+
+def benchmark(data_dir=DATA_DIR, repeat=5):
+    """Tüm hisse x strateji: eski döngü ile dizi motorunu karşılaştırır (sonuçlar birebir mi, süre)."""
+    frames = {s: load_stock_df(s, data_dir) for s in list_symbols(data_dir)}
+    frames = {s: df for s, df in frames.items() if df is not None}
+    for key, name in STRATEGIES.items():
+        t_loop = t_vec = 0.0; same = 0
+        for df in frames.values():
+            t0 = time.perf_counter(); ref = _run_backtest_loop(df, name); t_loop += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for _ in range(repeat): res = run_backtest(df, name)
+            t_vec += (time.perf_counter() - t0) / repeat
+            same += (res[0], res[1], res[2], res[4]) == ref
+        k = len(frames)
+        print(f"  {key:<5} döngü {t_loop / k * 1000:7.2f} ms   dizi {t_vec / k * 1000:6.2f} ms   "
+              f"x{t_loop / t_vec:5.0f}   aynı {same}/{k}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dizi tabanlı backtest motoru")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("bench", help="Eski döngü ile karşılaştır")
+    p_run = sub.add_parser("run", help="Tek hisse backtest özeti")
+    p_run.add_argument("hisse")
+    p_run.add_argument("strateji", choices=list(STRATEGIES))
+    p_board = sub.add_parser("liderlik", help="Tüm hisse x strateji liderlik tablosu")
+    p_board.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    p_board.add_argument("--top", type=int, default=20, help="Gösterilecek satır")
+    p_board.add_argument("--sort", default="Getiri %", choices=LEADERBOARD_COLUMNS, help="Sıralama sütunu")
+    args = parser.parse_args()
+    if args.cmd == "bench": benchmark()
+    elif args.cmd == "liderlik":
+        t0 = time.perf_counter()
+        board = leaderboard(workers=args.workers)
+        print(f"{board['Hisse'].nunique()} hisse x {board['Strateji'].nunique()} strateji: {time.perf_counter() - t0:.2f} sn")
+        print(board.sort_values(args.sort, ascending=False).head(args.top).to_string(index=False, float_format="%.1f"))
+    else:
+        df = load_stock_df(args.hisse.upper(), DATA_DIR)
+        if df is None: raise SystemExit(f"{args.hisse} verisi yok")
+        trades, equity, signals, _, status = run_backtest(df, STRATEGIES[args.strateji])
+        print(f"{args.hisse.upper()} {args.strateji}: {len(trades)} işlem, getiri %{equity[-1] - 100:.1f}, {status}")
@@ -0,0 +1,170 @@
+import os
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# --- EXCEL RAPOR YAZICISI ---
+# Tarayıcı raporları xlsxwriter'ın sabit bellek (constant_memory) kipinde
+# yazılır: satırlar sırayla diske akar, hücre nesnesi tutulmaz. Renkler hücre
+# hücre döngüyle değil, tarayıcının REPORT_STYLE tanımından koşullu biçim
+# (formül kuralı) ve satır biçimi olarak verilir; sütun genişlikleri
+# DataFrame üzerinden vektörel hesaplanır.
+#
+# REPORT_STYLE = {sayfa_adı veya "*": {
+#     "header": {...},  # başlık biçimi (pandas'ın varsayılan başlığının üstüne)
+#     "data":   {...},  # tüm veri hücrelerine sabit biçim
+#     "width":  15 | "auto",  # sabit genişlik veya içeriğe göre (en fazla MAX_WIDTH)
+#     "rules":  [{"formula": '=$K{r}="UP"', "format": {...}, "columns": "L", "stop": True}, ...],
+# }}
+# Kurallar sırayla önceliklidir; formüldeki {r} ilk veri satırıdır, göreli
+# başvurular aralık boyunca kayar. columns verilmezse kural tüm satıra uygulanır.
+MAX_WIDTH = 50
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}  # pandas başlığı
+INDEX_FORMAT = {"bold": True, "border": 1, "valign": "top"}
+DATE_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+def _cells(df):
+    """Yazılacak değerler: NaN -> boş hücre, ±inf -> 'inf'/'-inf' (pandas to_excel gibi)."""
+    out = df.astype(object).where(df.notna(), None)
+    for col in np.flatnonzero([pd.api.types.is_float_dtype(t) for t in df.dtypes]):
+        x = df.iloc[:, col].to_numpy()
+        inf = np.isinf(x)
+        if inf.any(): out.iloc[inf, col] = np.where(x[inf] > 0, "inf", "-inf")
+    return out.to_numpy()
+
+
+def _scalar(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _str_len(values):
+    x = values.dropna().to_numpy()
+    return int(np.char.str_len(x.astype(str)).max()) if len(x) else 0
+
+
+def column_widths(df, index=False):
+    """İçeriğe göre sütun genişlikleri: en uzun metin (başlık dahil) + 2, en fazla MAX_WIDTH."""
+    cols = ([df.index] if index else []) + [df.iloc[:, i] for i in range(df.shape[1])]
+    heads = ([""] if index else []) + [str(c) for c in df.columns]
+    return [min(max(len(h), _str_len(c)) + 2, MAX_WIDTH) for h, c in zip(heads, cols)]
+
+
+def _letter(col):
+    name = ""
+    col += 1
+    while col: col, rem = divmod(col - 1, 26); name = chr(65 + rem) + name
+    return name
+
+
+def write_sheet(wb, name, df, style=None, index=False, formats=None):
+    """Tek sayfa: başlık, satırlar (sırayla), genişlikler ve koşullu biçimler."""
+    style = style or {}
+    formats = {} if formats is None else formats
+
+    def fmt(spec, kind="xf"):  # koşullu biçimler (dxf) hücre biçimleriyle paylaşılmaz
+        key = (kind,) + tuple(sorted(spec.items()))
+        if key not in formats: formats[key] = wb.add_format(spec)
+        return formats[key]
+
+    ws = wb.add_worksheet(name)
+    off = 1 if index else 0
+    n_rows, n_cols = df.shape
+    head = fmt({**HEADER_FORMAT, **style.get("header", {})})
+    data = fmt(style["data"]) if "data" in style else None
+    idx_fmt = fmt(INDEX_FORMAT)
+
+    width = style.get("width")
+    if width == "auto":
+        for c, w in enumerate(column_widths(df, index)): ws.set_column(c, c, w)
+    elif width: ws.set_column(0, n_cols + off - 1, width)
+
+    ws.write_row(0, off, [_scalar(c) if isinstance(c, (int, float, np.number)) else str(c) for c in df.columns], head)
+    labels = [_scalar(v) for v in df.index] if index else None
+    for r, row in enumerate(_cells(df).tolist(), 1):
+        if index: ws.write(r, 0, labels[r - 1], idx_fmt)
+        ws.write_row(r, off, row, data)
+
+    if n_rows and n_cols:
+        first, last = f"{_letter(off)}2", f"{_letter(off + n_cols - 1)}{n_rows + 1}"
+        for rule in style.get("rules", ()):
+            cols = rule.get("columns")
+            rng = f"{cols}2:{cols}{n_rows + 1}" if cols else f"{first}:{last}"
+            ws.conditional_format(rng, {"type": "formula", "criteria": rule["formula"].format(r=2),
+                                        "format": fmt(rule["format"], "dxf"), "stop_if_true": rule.get("stop", False)})
+    return ws
+
+
+def write_report(path, sheets, style=None, index=()):
+    """{sayfa: DataFrame} -> Excel (sabit bellek kipi). style: REPORT_STYLE."""
+    import xlsxwriter
+    style = style or {}
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": DATE_FORMAT,
+                                    "remove_timezone": True, "strings_to_numbers": False,
+                                    "strings_to_formulas": False, "strings_to_urls": False})
+    formats = {}
+    try:
+        for name, df in sheets.items():
+            write_sheet(wb, name, df, style.get(name, style.get("*")), name in index, formats)
+    finally:
+        wb.close()
+    return path
+
+
+def _measure(func):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dt, peak
+
+
+def benchmark(keys=None, out_dir=None, repeat=3):
+    """Kayıtlı son sonuçlar için bu yazıcı ile pandas to_excel (openpyxl, renksiz) karşılaştırması.
+    Süre en iyi tekrar; bellek tracemalloc tepe değeri (ayrı koşuda)."""
+    import tempfile
+    import tarama_motoru
+    import tarama_sonucu
+    out_dir = out_dir or tempfile.mkdtemp(prefix="excel_rapor_")
+    print(f"   {'Tarayıcı':<24} {'hücre':>6} {'openpyxl':>9} {'yeni':>8} {'hız':>6} {'bellek (MB)':>14}")
+    rows = {}
+    for k in keys or tarama_motoru.SCANNERS:
+        res = tarama_sonucu.latest(k)
+        if res is None or not res.sheets: continue
+        style = getattr(tarama_motoru.load_scanner(k), "REPORT_STYLE", None)
+        old_path, new_path = os.path.join(out_dir, f"{k}_openpyxl.xlsx"), os.path.join(out_dir, f"{k}.xlsx")
+
+        def old():
+            with pd.ExcelWriter(old_path, engine="openpyxl") as writer:
+                for name, df in res.sheets.items(): df.to_excel(writer, sheet_name=name, index=name in res.index)
+
+        def new(): write_report(new_path, res.sheets, style, res.index)
+
+        t_old = min(_timed(old) for _ in range(repeat))
+        t_new = min(_timed(new) for _ in range(repeat))
+        m_old, m_new = _measure(old)[1], _measure(new)[1]
+        cells = sum(df.size for df in res.sheets.values())
+        rows[k] = {"cells": cells, "openpyxl": t_old, "xlsxwriter": t_new, "mem_openpyxl": m_old, "mem_xlsxwriter": m_new}
+        print(f"   {tarama_motoru.SCANNERS[k][1]:<24} {cells:6d} {t_old * 1000:7.0f}ms {t_new * 1000:6.0f}ms "
+              f"x{t_old / max(t_new, 1e-9):4.1f} {m_old / 2**20:6.1f} -> {m_new / 2**20:4.1f}")
+    return rows
+
+
+def _timed(func):
+    t0 = time.perf_counter()
+    func()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Excel rapor yazıcısı")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_bench = sub.add_parser("bench", help="openpyxl ile süre/bellek karşılaştırması (kayıtlı sonuçlar)")
+    p_bench.add_argument("scanners", nargs="*")
+    p_bench.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.scanners or None, repeat=args.repeat)
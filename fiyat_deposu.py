@@ -0,0 +1,212 @@
+import os
+import glob
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- DEPO FORMATI ---
+# Her hisse DATAson/<HISSE>.npy dosyasında tutulur. Dosya tek bir 0 boyutlu
+# yapısal dizidir; her sütun (n,) boyutlu ayrı bir alan olduğundan sütunlar
+# diskte art arda ve bitişik durur (sütunsal). np.load(mmap_mode='r') ile
+# bellek eşlemeli açılır, sütun adları ve bar sayısı .npy başlığındadır.
+STORE_EXT = '.npy'
+REVISION_RTOL = 1e-6  # Artımlı güncellemede örtüşen barların kabul edilen göreli farkı
+COLUMNS = ["DATE", "OPEN_TL", "HIGH_TL", "LOW_TL", "CLOSING_TL", "VOLUME_TL"]
+SKIP_FILES = ("TEMEL_VERILER",)
+
+COL_ALIASES = {
+    "DATE": ["DATE", "TARIH", "TARİH", "TIME"],
+    "OPEN_TL": ["OPEN_TL", "OPEN", "ACILIS", "AÇILIŞ"],
+    "HIGH_TL": ["HIGH_TL", "HIGH"],
+    "LOW_TL": ["LOW_TL", "LOW"],
+    "CLOSING_TL": ["CLOSING_TL", "CLOSE", "KAPANIS", "KAPANIŞ"],
+    "VOLUME_TL": ["VOLUME_TL", "VOLUME", "VOL", "HACIM"],
+}
+
+
+def store_dtype(n):
+    return np.dtype([("DATE", "<M8[ns]", (n,))] + [(c, "<f8", (n,)) for c in COLUMNS[1:]])
+
+
+def symbol_path(symbol, data_dir=DATA_DIR, ext=STORE_EXT):
+    return os.path.join(data_dir, f"{symbol}{ext}")
+
+
+def normalize_columns(df):
+    """Sütun adlarını büyük harfe çevirir ve bilinen takma adları standart ada eşler."""
+    df.columns = [str(c).strip().upper() for c in df.columns]
+    for t, aliases in COL_ALIASES.items():
+        if t not in df.columns:
+            for a in aliases:
+                if a in df.columns: df.rename(columns={a: t}, inplace=True); break
+    return df
+
+
+def list_symbols(data_dir=DATA_DIR):
+    """Depodaki hisseler (.npy) + henüz taşınmamış eski .xlsx dosyaları."""
+    names = {os.path.basename(f)[:-len(STORE_EXT)] for f in glob.glob(os.path.join(data_dir, f"*{STORE_EXT}"))}
+    for f in glob.glob(os.path.join(data_dir, "*.xlsx")):
+        name = os.path.basename(f)[:-5]
+        if not name.startswith("~$") and not any(s in name for s in SKIP_FILES): names.add(name)
+    return sorted(names)
+
+
+def last_modified(data_dir=DATA_DIR):
+    """Depodaki en yeni fiyat dosyasının değişim zamanı (yoksa 0)."""
+    files = glob.glob(os.path.join(data_dir, f"*{STORE_EXT}")) + [f for f in glob.glob(os.path.join(data_dir, "*.xlsx")) if not any(s in f for s in SKIP_FILES)]
+    return max((os.path.getmtime(f) for f in files), default=0)
+
+
+def frame_to_array(df):
+    """Ham fiyat tablosunu (yfinance veya eski xlsx) depo dizisine çevirir."""
+    df = normalize_columns(df.copy())
+    if "DATE" not in df.columns or "CLOSING_TL" not in df.columns:
+        raise ValueError("DATE / CLOSING_TL sütunu yok")
+    df["DATE"] = pd.to_datetime(df["DATE"], errors='coerce')
+    if getattr(df["DATE"].dt, 'tz', None) is not None: df["DATE"] = df["DATE"].dt.tz_localize(None)
+    df = df.dropna(subset=["DATE", "CLOSING_TL"]).sort_values("DATE")
+
+    arr = np.zeros((), dtype=store_dtype(len(df)))
+    arr["DATE"] = df["DATE"].to_numpy(dtype="datetime64[ns]")
+    for c in COLUMNS[1:]:
+        arr[c] = pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) if c in df.columns else np.nan
+    return arr
+
+
+def array_to_frame(arr):
+    data = {"DATE": np.asarray(arr["DATE"])}
+    for c in COLUMNS[1:]:
+        col = np.asarray(arr[c])
+        # Kaynakta hiç olmayan sütun (örn. hacimsiz endeks) tamamen NaN saklanır; geri vermiyoruz
+        if c == "CLOSING_TL" or not np.isnan(col).all(): data[c] = col
+    return pd.DataFrame(data)
+
+
+def save_array(symbol, arr, data_dir=DATA_DIR):
+    # Geçici dosyaya yaz + os.replace: okuyan tarayıcı yarım dosya görmez
+    path = symbol_path(symbol, data_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh: np.save(fh, arr, allow_pickle=False)
+    os.replace(tmp, path)
+    return path
+
+
+def save_prices(symbol, df, data_dir=DATA_DIR, export_xlsx=False):
+    path = save_array(symbol, frame_to_array(df), data_dir)
+    if export_xlsx: export_xlsx_file(symbol, data_dir)
+    return path
+
+
+def export_xlsx_file(symbol, data_dir=DATA_DIR):
+    """Depodaki tam seriyi isteğe bağlı olarak eski formatta <HISSE>.xlsx'e yazar."""
+    read_prices(symbol, data_dir).to_excel(symbol_path(symbol, data_dir, ".xlsx"), index=False)
+
+
+def append_array(symbol, new_arr, data_dir=DATA_DIR, rtol=REVISION_RTOL):
+    """Yeni barları depoya ekler.
+
+    new_arr, depodaki son birkaç barla örtüşerek başlamalıdır. Dönüş değeri
+    'appended', 'unchanged' veya 'revised'. 'revised' durumunda hiçbir şey
+    yazılmaz: örtüşen eski barlar değişmiş (bölünme/temettü düzeltmesi) ya da
+    örtüşme yok demektir; çağıran tam yenileme yapmalıdır. Sadece depodaki en
+    son bar farklıysa (kapanışın sonradan kesinleşmesi) o bar güncellenir.
+    """
+    old = load_array(symbol, data_dir, mmap=False)
+    if old is None: return 'revised'
+    old_dates, new_dates = old["DATE"], new_arr["DATE"]
+
+    common, i_old, i_new = np.intersect1d(old_dates, new_dates, return_indices=True)
+    if common.shape[0] == 0: return 'revised'
+    # İlk örtüşen tarihten sonraki tüm eski barlar yeni veride de olmalı
+    if (old_dates >= common[0]).sum() != common.shape[0]: return 'revised'
+    check = i_old != old_dates.shape[0] - 1
+    for c in ("OPEN_TL", "HIGH_TL", "LOW_TL", "CLOSING_TL"):
+        if not np.isclose(old[c][i_old][check], new_arr[c][i_new][check], rtol=rtol, atol=0, equal_nan=True).all():
+            return 'revised'
+
+    keep = old_dates < common[0]
+    tail = new_dates >= common[0]
+    n_old, n_new = int(keep.sum()), int(tail.sum())
+    merged = np.zeros((), dtype=store_dtype(n_old + n_new))
+    for c in COLUMNS:
+        merged[c][:n_old] = old[c][keep]
+        merged[c][n_old:] = new_arr[c][tail]
+    if n_old + n_new == old_dates.shape[0] and all(np.array_equal(merged[c], old[c], equal_nan=True) for c in COLUMNS[1:]):
+        return 'unchanged'
+    save_array(symbol, merged, data_dir)
+    return 'appended'
+
+
+def load_array(symbol, data_dir=DATA_DIR, mmap=True):
+    """Depo dizisini bellek eşlemeli açar; dosya yoksa None."""
+    path = symbol_path(symbol, data_dir)
+    if not os.path.exists(path): return None
+    return np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+def read_prices(symbol, data_dir=DATA_DIR):
+    """Hisse fiyatlarını DataFrame olarak döner. .npy yoksa eski .xlsx dosyasına düşer."""
+    arr = load_array(symbol, data_dir)
+    if arr is not None: return array_to_frame(arr)
+    xlsx = symbol_path(symbol, data_dir, ".xlsx")
+    if not os.path.exists(xlsx): return None
+    return array_to_frame(frame_to_array(pd.read_excel(xlsx)))
+
+
+# ==================== TAŞIMA VE ÖLÇÜM ====================
+def migrate(data_dir=DATA_DIR, remove_xlsx=False, force=False):
+    """DATAson içindeki eski <HISSE>.xlsx dosyalarını .npy depoya tek seferde taşır."""
+    files = [f for f in glob.glob(os.path.join(data_dir, "*.xlsx"))
+             if not any(s in os.path.basename(f) for s in SKIP_FILES) and not os.path.basename(f).startswith("~$")]
+    done = skipped = failed = 0
+    for f in sorted(files):
+        symbol = os.path.basename(f)[:-5]
+        target = symbol_path(symbol, data_dir)
+        try:
+            if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(f):
+                skipped += 1
+            else:
+                save_array(symbol, frame_to_array(pd.read_excel(f)), data_dir); done += 1
+            if remove_xlsx: os.remove(f)
+        except Exception as e:
+            failed += 1
+            print(f"❌ {symbol}: {e}")
+    print(f"✅ Taşıma bitti. Yeni: {done}, Güncel (atlandı): {skipped}, Hatalı: {failed}")
+    return done
+
+
+def benchmark(data_dir=DATA_DIR):
+    """Tüm evreni önce eski yol (read_excel), sonra .npy depodan okuyup süreleri yazar."""
+    symbols = [s for s in list_symbols(data_dir) if os.path.exists(symbol_path(s, data_dir))]
+    with_xlsx = [s for s in symbols if os.path.exists(symbol_path(s, data_dir, ".xlsx"))]
+    print(f"Ölçüm: {len(symbols)} hisse (.npy), {len(with_xlsx)} hisse (.xlsx)")
+    if with_xlsx:
+        t0 = time.perf_counter()
+        for s in with_xlsx: normalize_columns(pd.read_excel(symbol_path(s, data_dir, ".xlsx")))
+        t_xlsx = time.perf_counter() - t0
+        print(f"  read_excel      : {t_xlsx:8.3f} sn  ({t_xlsx / len(with_xlsx) * 1000:7.2f} ms/hisse)")
+    t0 = time.perf_counter()
+    for s in symbols: read_prices(s, data_dir)
+    t_npy = time.perf_counter() - t0
+    print(f"  npy -> DataFrame: {t_npy:8.3f} sn  ({t_npy / max(len(symbols), 1) * 1000:7.2f} ms/hisse)")
+    t0 = time.perf_counter()
+    for s in symbols: float(load_array(s, data_dir)["CLOSING_TL"][-1])
+    t_mm = time.perf_counter() - t0
+    print(f"  npy mmap (ham)  : {t_mm:8.3f} sn  ({t_mm / max(len(symbols), 1) * 1000:7.2f} ms/hisse)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DATAson fiyat deposu araçları")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_mig = sub.add_parser("migrate", help="Eski .xlsx dosyalarını .npy depoya taşı")
+    p_mig.add_argument("--remove-xlsx", action="store_true", help="Taşınan .xlsx dosyalarını sil")
+    p_mig.add_argument("--force", action="store_true", help="Güncel olanları da yeniden yaz")
+    sub.add_parser("bench", help="xlsx ve npy okuma sürelerini karşılaştır")
+    args = parser.parse_args()
+    if args.cmd == "migrate": migrate(remove_xlsx=args.remove_xlsx, force=args.force)
+    elif args.cmd == "bench": benchmark()
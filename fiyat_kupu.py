@@ -0,0 +1,295 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import fiyat_deposu
+from indikatorler import lfilter, _window_sums, calculate_wma, ribbon_tail, EMA_RIBBON
+from yukleyici import load_stock_df, cache_summary
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- FİYAT KÜPÜ ---
+# Tüm evren tek seferde (tarih x hisse) dizilerine yüklenir. İki görünüm var:
+#   takvim : (T, N), T tüm hisselerin tarih birleşimi; valid maskesi o gün
+#            işlem görmeyen (eksik gün, halka arz öncesi, kota dışı) hücreleri
+#            ayırır, bu hücreler NaN'dır.
+#   bar    : (L, N), her hissenin kendi barları sağa hizalı; son satır her
+#            hissenin son barı (tarayıcılardaki iloc[-1]), başındaki dolgu NaN.
+# İndikatörler bar görünümünde sütun sütun hesaplanır; böylece sonuçlar hisse
+# hisse yapılan hesapla aynıdır. Gerekirse to_calendar ile takvime yayılır.
+FIELDS = ("OPEN_TL", "HIGH_TL", "LOW_TL", "CLOSING_TL", "VOLUME_TL")
+EMA_PERIODS = EMA_RIBBON
+
+_cache = {}  # (data_dir, semboller, alanlar) -> (depo_damgası, küp)
+
+
+class PriceCube:
+    """Hizalı fiyat küpü: dates (T,), symbols (N,), bar dizileri (L, N) ve
+    pos (L, N) - her barın takvim satırı (dolgu -1)."""
+
+    def __init__(self, dates, symbols, bars, pos):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self._bars = bars
+        self.pos = pos
+        self.lengths = (pos >= 0).sum(axis=0)
+        self._cols = np.broadcast_to(np.arange(len(self.symbols)), pos.shape)
+        self.valid = np.zeros((len(dates), len(self.symbols)), dtype=bool)
+        self.valid[pos[pos >= 0], self._cols[pos >= 0]] = True
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    def bars(self, field="CLOSING_TL"):
+        """Sağa hizalı (L, N) bar dizisi (salt okunur, kopyalamadan)."""
+        return self._bars[field]
+
+    def to_calendar(self, arr):
+        """Bar görünümündeki (L, N) diziyi takvime (T, N) yayar; geçersiz hücreler NaN."""
+        out = np.full(self.shape, np.nan)
+        m = self.pos >= 0
+        out[self.pos[m], self._cols[m]] = np.asarray(arr)[m]
+        return out
+
+    def calendar(self, field="CLOSING_TL"):
+        return self.to_calendar(self._bars[field])
+
+    def frame(self, field="CLOSING_TL"):
+        """Takvim görünümü DataFrame olarak (index tarih, sütunlar hisse)."""
+        return pd.DataFrame(self.calendar(field), index=pd.DatetimeIndex(self.dates), columns=self.symbols)
+
+    def last(self, arr):
+        """Bar dizisinin son satırı hisse adıyla (tarayıcıdaki .iloc[-1])."""
+        return pd.Series(np.asarray(arr)[-1], index=self.symbols)
+
+
+def _symbol_columns(hisse, data_dir, fields):
+    arr = fiyat_deposu.load_array(hisse, data_dir)
+    if arr is not None:
+        return np.asarray(arr["DATE"]), {f: np.asarray(arr[f], dtype=float) for f in fields}
+    df = fiyat_deposu.read_prices(hisse, data_dir)  # taşınmamış eski .xlsx
+    if df is None: return None, None
+    return df["DATE"].to_numpy(dtype="datetime64[ns]"), {
+        f: df[f].to_numpy(dtype=float) if f in df.columns else np.full(len(df), np.nan) for f in fields}
+
+
+def build_cube(data_dir=DATA_DIR, symbols=None, fields=FIELDS):
+    """Depodaki hisseleri (veya verilen listeyi) tek bir PriceCube'a dizer."""
+    symbols = fiyat_deposu.list_symbols(data_dir) if symbols is None else list(symbols)
+    loaded = []
+    for hisse in symbols:
+        try: dates, cols = _symbol_columns(hisse, data_dir, fields)
+        except Exception: continue
+        if dates is not None and len(dates): loaded.append((hisse, dates, cols))
+    if not loaded:
+        return PriceCube(np.array([], dtype="datetime64[ns]"), [], {f: np.empty((0, 0)) for f in fields},
+                         np.empty((0, 0), dtype=int))
+
+    calendar = np.unique(np.concatenate([d for _, d, _ in loaded]))
+    n_bars = max(len(d) for _, d, _ in loaded)
+    bars = {f: np.full((n_bars, len(loaded)), np.nan) for f in fields}
+    pos = np.full((n_bars, len(loaded)), -1, dtype=np.int64)
+    for j, (_, dates, cols) in enumerate(loaded):
+        start = n_bars - len(dates)
+        pos[start:, j] = np.searchsorted(calendar, dates)
+        for f in fields: bars[f][start:, j] = cols[f]
+    for a in bars.values(): a.flags.writeable = False
+    return PriceCube(calendar, [h for h, _, _ in loaded], bars, pos)
+
+
+def load_cube(data_dir=DATA_DIR, symbols=None, fields=FIELDS):
+    """build_cube'un önbellekli hali: depoda dosya değişmedikçe aynı küp döner."""
+    key = (os.path.abspath(data_dir), None if symbols is None else tuple(symbols), tuple(fields))
+    stamp = fiyat_deposu.last_modified(data_dir)
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == stamp: return hit[1]
+    cube = build_cube(data_dir, symbols, fields)
+    _cache[key] = (stamp, cube)
+    return cube
+
+
+# ==================== SÜTUNSAL İNDİKATÖRLER ====================
+# Girdi (L, N) bar dizisi; her sütunun baştaki NaN'ları dolgu sayılır ve
+# çıktıda da NaN kalır. Hepsi tüm hisseler için tek NumPy/SciPy çağrısıdır.
+def _first_valid(x):
+    """Her sütunun ilk dolu satırı (tamamen boş sütunda len(x))."""
+    ok = ~np.isnan(x)
+    return np.where(ok.any(axis=0), ok.argmax(axis=0), len(x))
+
+
+def _pad_mask(x):
+    return np.arange(len(x))[:, None] < _first_valid(x)[None, :]
+
+
+def _seed_fill(x):
+    """Baştaki dolguyu sütunun ilk değeriyle doldurur: sabit girdide EMA
+    tohumda kalır, bu yüzden dolgu sonucu değiştirmez. (doldurulmuş, dolgu maskesi)"""
+    first = _first_valid(x)
+    pad = _pad_mask(x)
+    seed = x[np.minimum(first, len(x) - 1), np.arange(x.shape[1])]
+    return np.where(pad, seed[None, :], x), pad
+
+
+def ema(x, span):
+    """ewm(span, adjust=False).mean() ile aynı; ilk değer tohum. Baştaki
+    dolgu ilk değerle doldurulup tek lfilter çağrısıyla süzülür."""
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0: return x.copy()
+    a = 2.0 / (span + 1)
+    xf, pad = _seed_fill(x)
+    out = np.empty_like(xf)
+    out[0] = xf[0]
+    out[1:] = lfilter([a], [1.0, a - 1.0], xf[1:], axis=0, zi=((1.0 - a) * xf[0])[None, :])[0]
+    out[pad] = np.nan
+    return out
+
+
+def ema_tail(x, span, k=1):
+    """EMA'nın yalnızca son k satırı, (k, N). Tüm seriyi süzmek yerine kapalı
+    form: y_T = (1-a)^T x_0 + sum a (1-a)^(T-i) x_i, satır başına tek çarpım."""
+    return ribbon_tail(_seed_fill(np.asarray(x, dtype=float))[0], [span], k)[:, 0]
+
+
+def rolling_sum(x, l):
+    """rolling(l).sum(): içinde NaN olan pencereler NaN."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if len(x) < l: return out
+    nan = np.isnan(x)
+    out[l - 1:] = _window_sums(np.where(nan, 0.0, x), l)
+    out[l - 1:][_window_sums(nan.astype(float), l) > 0] = np.nan
+    return out
+
+
+def rolling_mean(x, l):
+    return rolling_sum(x, l) / l
+
+
+def rolling_std(x, l, ddof=1):
+    """rolling(l).std(ddof); sütun ortalaması çıkarılarak toplanır (kararlılık)."""
+    x = np.asarray(x, dtype=float)
+    with np.errstate(all="ignore"): ref = np.nanmean(x, axis=0) if len(x) else 0.0
+    v = x - np.nan_to_num(ref)
+    s1, s2 = rolling_sum(v, l), rolling_sum(v * v, l)
+    return np.sqrt(np.maximum(s2 - s1 * s1 / l, 0.0) / (l - ddof))
+
+
+def wma(x, l):
+    return calculate_wma(np.asarray(x, dtype=float), l)
+
+
+def diff(x, k=1):
+    out = np.full(np.shape(x), np.nan)
+    out[k:] = np.asarray(x)[k:] - np.asarray(x)[:-k]
+    return out
+
+
+def rsi(x, period=14):
+    """Tarayıcılardaki SMA tabanlı RSI (rolling mean kazanç/kayıp, boşlar 50).
+    pandas'taki gibi ilk barın değişimi 0 sayılır; dolgu satırları NaN."""
+    d = np.nan_to_num(diff(x))
+    gain = rolling_mean(np.maximum(d, 0), period)
+    loss = rolling_mean(-np.minimum(d, 0), period)
+    pad = _pad_mask(x)
+    # Dolgu barlarının 0 değişimi pencereye girmesin: sütunun kendi ilk barından say
+    pre = np.arange(len(x))[:, None] < (_first_valid(x) + period - 1)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"): out = 100 - (100 / (1 + gain / loss))
+    out[np.isnan(out)] = 50.0
+    out[pre] = 50.0
+    out[pad] = np.nan
+    return out
+
+
+# ==================== KESİTSEL TARAMA İFADELERİ ====================
+def guclu_trend_durum(cube, min_bars=233, periods=EMA_PERIODS):
+    """Güçlü Trend 'Durum' sütunu tüm evren için: 'IDEAL UP', 'UP' veya ''."""
+    close = cube.bars("CLOSING_TL")
+    e = ribbon_tail(_seed_fill(close)[0], periods, 1)[-1]  # (P, N) son bar
+    curr = close[-1]
+    ideal = (curr > e[0]) & np.all(e[:-1] > e[1:], axis=0)
+    up = np.all(curr > e, axis=0)
+    durum = np.where(ideal, "IDEAL UP", np.where(up, "UP", ""))
+    keep = cube.lengths >= min_bars
+    return pd.Series(durum[keep], index=np.asarray(cube.symbols)[keep])
+
+
+def hacimli_ema_crosses(cube, min_bars=240, periods=EMA_PERIODS):
+    """Hacimli EMA: son gün yukarı kesilen EMA'lar (hisse x periyot bool) ve
+    hacim ortalamanın %20 üstünde mi ('HACIMLI' sütunu)."""
+    close = cube.bars("CLOSING_TL")
+    curr, prev = close[-1], close[-2]
+    e = ribbon_tail(_seed_fill(close)[0], periods, 2)  # (2, P, N)
+    table = {p: (prev < e[0, j]) & (curr > e[1, j]) for j, p in enumerate(periods)}
+    vol = cube.bars("VOLUME_TL")
+    vol = np.where(np.isnan(vol).all(axis=0), 0.0, vol)  # hacimsiz hisse: df.get(..., 0) gibi
+    table["HACIMLI"] = vol[-1] > rolling_mean(vol[-20:], 20)[-1] * 1.2
+    keep = cube.lengths >= min_bars
+    return pd.DataFrame(table, index=cube.symbols)[keep]
+
+
+# ==================== ÖLÇÜM ====================
+def _loop_guclu(data_dir):
+    # Eski yol: her dosya ayrı yüklenip EMA'lar tek tek hesaplanır
+    out = {}
+    for hisse in fiyat_deposu.list_symbols(data_dir):
+        df = load_stock_df(hisse, data_dir, min_bars=233)
+        if df is None: continue
+        close = df['CLOSING_TL']; curr = close.iloc[-1]
+        vals = [close.ewm(span=p, adjust=False).mean().iloc[-1] for p in EMA_PERIODS]
+        is_ideal = all(vals[i] > vals[i + 1] for i in range(len(vals) - 1)) and (curr > vals[0])
+        is_up = all(curr > v for v in vals)
+        out[hisse] = 'IDEAL UP' if is_ideal else ('UP' if is_up else '')
+    return pd.Series(out)
+
+
+def _loop_hacimli(data_dir):
+    out = {}
+    for hisse in fiyat_deposu.list_symbols(data_dir):
+        df = load_stock_df(hisse, data_dir, min_bars=240)
+        if df is None: continue
+        close = df['CLOSING_TL']; vol = df.get('VOLUME_TL', pd.Series(0, index=df.index))
+        curr, prev = close.iloc[-1], close.iloc[-2]
+        row = {}
+        for p in EMA_PERIODS:
+            e = close.ewm(span=p, adjust=False).mean()
+            row[p] = bool(prev < e.iloc[-2] and curr > e.iloc[-1])
+        row["HACIMLI"] = bool(vol.iloc[-1] > vol.rolling(20).mean().iloc[-1] * 1.2)
+        out[hisse] = row
+    return pd.DataFrame(out).T.astype(bool)
+
+
+def benchmark(data_dir=DATA_DIR, repeat=5):
+    """Güçlü Trend IDEAL UP ve Hacimli EMA kesişim kontrolünü dosya dosya döngü ile
+    küp üzerindeki dizi ifadeleriyle karşılaştırır (ikisi de sıcak önbellekte)."""
+    t0 = time.perf_counter(); cube = build_cube(data_dir); t_build = time.perf_counter() - t0
+    L, N = cube.bars().shape
+    print(f"Küp: {N} hisse, {len(cube.dates)} takvim günü, {L} bar satırı, "
+          f"doluluk %{cube.valid.mean() * 100:.0f}, kurulum {t_build:.2f} sn")
+    for s in cube.symbols: load_stock_df(s, data_dir)  # döngü tarafı da sıcak başlasın
+    for name, loop, vec in (("Güçlü Trend durum", _loop_guclu, guclu_trend_durum),
+                            ("Hacimli EMA kesişim", _loop_hacimli, hacimli_ema_crosses)):
+        t0 = time.perf_counter(); ref = loop(data_dir); t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(repeat): res = vec(cube)
+        t_vec = (time.perf_counter() - t0) / repeat
+        res = res.reindex(ref.index)
+        same = int((res == ref).all(axis=1).sum()) if res.ndim == 2 else int((res == ref).sum())
+        print(f"  {name:<20} döngü {t_loop * 1000:8.1f} ms   küp {t_vec * 1000:7.1f} ms   "
+              f"x{t_loop / t_vec:6.0f}   aynı {same}/{len(ref)}")
+    print(f"  {cache_summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tarih x hisse fiyat küpü")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("bench", help="Dosya dosya döngü ile küp ifadelerini karşılaştır")
+    sub.add_parser("ideal", help="Güçlü Trend IDEAL UP listesini küpten yaz")
+    args = parser.parse_args()
+    if args.cmd == "bench": benchmark()
+    elif args.cmd == "ideal":
+        durum = guclu_trend_durum(load_cube())
+        print(", ".join(durum[durum == "IDEAL UP"].index) or "-")
@@ -1,18 +1,13 @@
 import pandas as pd
-import numpy as np
 import os
 import time
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font
-from openpyxl.utils import get_column_letter
-from sklearn.linear_model import LinearRegression
-from scipy.stats import pearsonr
-from tqdm import tqdm
-import colorama
-from colorama import Fore, Style
 
-colorama.init(autoreset=True)
+from fiyat_deposu import list_symbols
+from yukleyici import load_stock_df
+from indikator_durumu import snapshot
+import tarama_sonucu
+
 
 # ==================== BULUT UYUMLU AYARLAR ====================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,140 +18,106 @@ if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 # ==============================================================
 
-def load_stock_df(file_path):
-    try:
-        df = pd.read_excel(file_path)
-        df.columns = [str(c).strip().upper() for c in df.columns]
-        col_map = {"DATE": ["DATE","TARIH"], "CLOSING_TL": ["CLOSING_TL","CLOSE","KAPANIS"], "VOLUME_TL": ["VOLUME_TL","VOL","HACIM"]}
-        for t, aliases in col_map.items():
-            if t not in df.columns:
-                for a in aliases:
-                    if a in df.columns: df.rename(columns={a: t}, inplace=True); break
-        if "DATE" in df.columns:
-            df["DATE"] = pd.to_datetime(df["DATE"], errors='coerce')
-            df.dropna(subset=["DATE", "CLOSING_TL"], inplace=True)
-            df.sort_values("DATE", inplace=True)
-        if "CLOSING_TL" not in df.columns or len(df) < 233: return None
-        return df
-    except: return None
+# Tarama motoru (tarama_motoru.py) için arayüz
+LOAD_ARGS = {"min_bars": 233}
+EMA_PERIODS = [8, 13, 21, 34, 55, 89, 144, 233]
+PEARSON_PERIODS = [55, 89, 144, 233, 377, 610, 987]
+# Kalıcı durumdan okunan indikatörler (yeni bar gelince yalnız o bar işlenir)
+STATE_SPECS = [("ema", p) for p in EMA_PERIODS] + [("channels", tuple(PEARSON_PERIODS)), ("rsi", 14),
+                                                   ("sma", "VOLUME_TL", 10)]
+
+def analyze(hisse, df):
+    """Tek hisse: {'ema': detay satırı, 'strat': strateji satırı veya None}"""
+    close = df['CLOSING_TL']
+    curr = close.iloc[-1]
+    
+    # --- BÖLÜM 1: EMA ANALİZİ ---
+    state = snapshot(df, STATE_SPECS)
+    ribbon = state.ribbon(EMA_PERIODS, close.iloc[-2], curr)
+    ema_vals = ribbon['last']
+    
+    # IDEAL UP Kontrolü (Sıralı Dizilim)
+    is_ideal = ribbon['ideal_up']
+    is_up = ribbon['up']
+    
+    # Pearson ve 233 kanalı: tüm vadeler son 987 barlık tampondan
+    channels = state.last(("channels", tuple(PEARSON_PERIODS)))
+    p_data = {p: channels.at[p, 'pearson'] if len(df) >= p else 0 for p in PEARSON_PERIODS}
+    
+    res_row = {'Hisse': hisse, 'Fiyat': curr, 'Durum': 'IDEAL UP' if is_ideal else ('UP' if is_up else '')}
+    for p in EMA_PERIODS: res_row[f'EMA{p}'] = round(ema_vals[p], 2)
+    for p in PEARSON_PERIODS: res_row[f'P_{p}'] = round(p_data[p], 2)
+    
+    # --- BÖLÜM 2: KANAL VE STRATEJİ ---
+    # 233 Günlük Kanal
+    if len(df) < 233: return {'ema': res_row, 'strat': None}
+    lower = channels.at[233, 'lower']
+    dist_down = (curr - lower) / curr * 100
+    
+    rsi = state.last(("rsi", 14))
+    vol_surge = False
+    if 'VOLUME_TL' in df.columns:
+        vol_surge = df['VOLUME_TL'].iloc[-1] > (state.last(("sma", "VOLUME_TL", 10)) * 1.2)
+        
+    p_233 = p_data[233]
+    
+    label = ""; score = 0
+    if is_ideal and p_233 > 0.90 and rsi < 55 and dist_down < 3:
+        label = "🏆 TAM PUANLI"; score = 3
+    elif rsi < 35 and vol_surge:
+        label = "🚀 TEPKİ ADAYI"; score = 2
+    elif is_ideal and p_233 > 0.85 and rsi < 70:
+        label = "💪 GÜÇLÜ TREND"; score = 1
+        
+    strat = None
+    if label:
+        strat = {
+            'Hisse': hisse, 'STRATEJİ': label, 'Fiyat': curr, 'Pearson (233)': round(p_233, 2),
+            'RSI': round(rsi, 2), 'Hacim Artışı': "EVET" if vol_surge else "-",
+            'Alt Banda Uzaklık %': round(dist_down, 2), 'Skor': score
+        }
+    return {'ema': res_row, 'strat': strat}
+
+# Tarama geçmişine (tarama_gecmisi) yazılan sayfa ve sütunlar
+HISTORY = {"sheet": "Guclu_Trend_Takip", "symbol": "Hisse", "signal": "STRATEJİ", "score": "Pearson (233)"}
+
+def report_path(when):
+    return os.path.join(OUTPUT_DIR, f'Guclu_Trend_FULL_{when.strftime("%Y%m%d_%H%M")}.xlsx')
 
-def calculate_ema(data, period): return data.ewm(span=period, adjust=False).mean()
+def tables(results):
+    results_ema = [r['ema'] for r in results]
+    results_strat = [r['strat'] for r in results if r['strat']]
+    sheets = {}
+    if results_strat:
+        sheets['Guclu_Trend_Takip'] = pd.DataFrame(results_strat).sort_values(by=['Skor', 'Pearson (233)'], ascending=False).drop(columns=['Skor'])
+    if results_ema:
+        sheets['EMA_Pearson_Detay'] = pd.DataFrame(results_ema)
+    return sheets
 
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return (100 - (100 / (1 + rs))).fillna(50)
+REPORT_STYLE = {
+    'Guclu_Trend_Takip': {"width": "auto", "rules": [
+        {"formula": '=ISNUMBER(FIND("TAM PUANLI",$B{r}))', "columns": "B", "format": {"bg_color": "#FFD700"}, "stop": True},
+        {"formula": '=ISNUMBER(FIND("TEPKİ",$B{r}))', "columns": "B", "format": {"bg_color": "#00B050"}, "stop": True},
+        {"formula": '=ISNUMBER(FIND("GÜÇLÜ",$B{r}))', "columns": "B", "format": {"bg_color": "#7030A0"}},
+    ]},
+    'EMA_Pearson_Detay': {"width": "auto"},
+}
 
-def autofit(ws):
-    for column in ws.columns:
-        length = max(len(str(cell.value)) for cell in column if cell.value)
-        ws.column_dimensions[column[0].column_letter].width = min(length + 2, 50)
+def write_report(results):
+    return tarama_sonucu.export_excel(tables(results), report_path(datetime.now()), REPORT_STYLE)
 
 def main():
+    from tqdm import tqdm
     print(f"\n🚀 Güçlü Trend (Full Detay) Analizi Başlıyor...")
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith('.xlsx')]
-    
-    results_ema = []
-    results_strat = []
-    
-    ema_periods = [8, 13, 21, 34, 55, 89, 144, 233]
-    pearson_periods = [55, 89, 144, 233, 377, 610, 987]
-    all_pearson = {}
+    symbols = list_symbols(DATA_DIR)
+    results = []
 
-    for file in tqdm(files, desc="Hisseler Taranıyor"):
-        df = load_stock_df(os.path.join(DATA_DIR, file))
+    for hisse in tqdm(symbols, desc="Hisseler Taranıyor"):
+        df = load_stock_df(hisse, DATA_DIR, **LOAD_ARGS)
         if df is None: continue
-        
-        hisse = file.replace('.xlsx', '')
-        close = df['CLOSING_TL']
-        curr = close.iloc[-1]
-        
-        # --- BÖLÜM 1: EMA ANALİZİ ---
-        ema_vals = {p: calculate_ema(close, p).iloc[-1] for p in ema_periods}
-        
-        # IDEAL UP Kontrolü (Sıralı Dizilim)
-        vals = list(ema_vals.values())
-        is_ideal = all(vals[i] > vals[i+1] for i in range(len(vals)-1)) and (curr > vals[0])
-        is_up = all(curr > v for v in vals)
-        
-        # Pearson Hesaplama
-        p_data = {}
-        for p in pearson_periods:
-            if len(df) >= p:
-                y = close.tail(p).values
-                X = np.arange(len(y)).reshape(-1, 1)
-                p_data[p] = np.corrcoef(X.flatten(), y)[0, 1]
-            else: p_data[p] = 0
-        
-        all_pearson[hisse] = p_data
-        
-        res_row = {'Hisse': hisse, 'Fiyat': curr, 'Durum': 'IDEAL UP' if is_ideal else ('UP' if is_up else '')}
-        for p in ema_periods: res_row[f'EMA{p}'] = round(ema_vals[p], 2)
-        for p in pearson_periods: res_row[f'P_{p}'] = round(p_data[p], 2)
-        results_ema.append(res_row)
-        
-        # --- BÖLÜM 2: KANAL VE STRATEJİ ---
-        # 233 Günlük Kanal
-        if len(df) < 233: continue
-        y = close.tail(233).values
-        X = np.arange(len(y)).reshape(-1, 1)
-        model = LinearRegression().fit(X, y)
-        pred = model.predict(X)
-        std = np.std(y - pred)
-        
-        upper = pred[-1] + 2*std
-        lower = pred[-1] - 2*std
-        dist_down = (curr - lower) / curr * 100
-        
-        rsi = calculate_rsi(close).iloc[-1]
-        vol_surge = False
-        if 'VOLUME_TL' in df.columns:
-            vol_surge = df['VOLUME_TL'].iloc[-1] > (df['VOLUME_TL'].rolling(10).mean().iloc[-1] * 1.2)
-            
-        p_233 = p_data[233]
-        
-        label = ""; score = 0
-        if is_ideal and p_233 > 0.90 and rsi < 55 and dist_down < 3:
-            label = "🏆 TAM PUANLI"; score = 3
-        elif rsi < 35 and vol_surge:
-            label = "🚀 TEPKİ ADAYI"; score = 2
-        elif is_ideal and p_233 > 0.85 and rsi < 70:
-            label = "💪 GÜÇLÜ TREND"; score = 1
-            
-        if label:
-            results_strat.append({
-                'Hisse': hisse, 'STRATEJİ': label, 'Fiyat': curr, 'Pearson (233)': round(p_233, 2),
-                'RSI': round(rsi, 2), 'Hacim Artışı': "EVET" if vol_surge else "-",
-                'Alt Banda Uzaklık %': round(dist_down, 2), 'Skor': score
-            })
+        results.append(analyze(hisse, df))
 
-    # KAYIT
-    fname = os.path.join(OUTPUT_DIR, f'Guclu_Trend_FULL_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx')
-    with pd.ExcelWriter(fname, engine='openpyxl') as writer:
-        if results_strat:
-            df_s = pd.DataFrame(results_strat).sort_values(by=['Skor', 'Pearson (233)'], ascending=False).drop(columns=['Skor'])
-            df_s.to_excel(writer, sheet_name='Guclu_Trend_Takip', index=False)
-            ws = writer.sheets['Guclu_Trend_Takip']
-            
-            gold = PatternFill(start_color='FFD700', fill_type='solid')
-            green = PatternFill(start_color='00B050', fill_type='solid')
-            purple = PatternFill(start_color='7030A0', fill_type='solid')
-            
-            for row in ws.iter_rows(min_row=2):
-                val = str(row[1].value)
-                if "TAM PUANLI" in val: row[1].fill = gold
-                elif "TEPKİ" in val: row[1].fill = green
-                elif "GÜÇLÜ" in val: row[1].fill = purple
-            autofit(ws)
-            
-        if results_ema:
-            df_e = pd.DataFrame(results_ema)
-            df_e.to_excel(writer, sheet_name='EMA_Pearson_Detay', index=False)
-            autofit(writer.sheets['EMA_Pearson_Detay'])
-            
-    print(f"✅ Rapor Kaydedildi: {fname}")
+    write_report(results)
 
 if __name__ == "__main__":
     main()
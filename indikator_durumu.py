@@ -0,0 +1,361 @@
+import os
+import copy
+import time
+import pickle
+import hashlib
+import argparse
+import threading
+from collections import deque
+import numpy as np
+import fiyat_deposu
+from indikatorler import lfilter, recursive_filter, calculate_channels, ribbon_summary
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- KALICI İNDİKATÖR DURUMU ---
+# Günlük güncellemeden sonra taramalar 10 yıllık geçmişin tamamını yeniden
+# hesaplayıp yalnızca son barı okuyordu. Burada her hissenin indikatör durumu
+# (EMA birikimleri, Wilder ortalamaları, kayan pencere tamponları, regresyon
+# kuyruğu) DATAson/.durum/<HISSE>.pkl içinde tutulur ve sadece yeni eklenen
+# barlar kadar ilerletilir. Durum son iki bar için saklanır; son iki bardan
+# önceki FINGERPRINT_BARS barın ve seri uzunluğunun özeti (sha1) ile birlikte,
+# yani günlük kontrol geçmiş uzadıkça pahalılaşmaz:
+#   - depodaki son bar değişmişse (kapanış sonradan kesinleşti) bir önceki
+#     durumdan o bar yeniden oynatılır,
+#   - penceredeki barlar değişmişse (bölünme/temettü düzeltmesi tüm geçmişi
+#     geriye doğru ölçekler, pencereyi de değiştirir) ya da seri kısalmışsa
+#     durum tüm geçmişten vektörel olarak yeniden kurulur.
+# Daha eski barlardaki revizyonu indirme yakalar (fiyat_deposu.append_array
+# 'revised' -> tam yenileme); tam yazılan hissenin durumu invalidate() ile silinir.
+# Spec'ler demettir: ("ema", 8), ("tema", 34), ("rma", 14), ("rsi", 14),
+# ("mfi", 14), ("sma", "VOLUME_TL", 20), ("channels", (55, 89, 233)).
+STATE_DIR = ".durum"
+STATE_FORMAT = 4
+FINGERPRINT_BARS = 64
+BAR_FIELDS = ("DATE", "OPEN_TL", "HIGH_TL", "LOW_TL", "CLOSING_TL", "VOLUME_TL")
+
+_states = {}  # yol -> (mtime_ns, durum) ; aynı süreçte dosyayı tekrar açmamak için
+_lock = threading.Lock()
+_path_locks = {}  # yol -> kilit; aynı hissenin oku -> ilerlet -> yaz adımları sırayla
+_stats = {"advanced": 0, "replayed": 0, "rebuilt": 0, "fresh": 0, "bars": 0}
+
+
+# ==================== İNDİKATÖR TÜRLERİ ====================
+# Her tür için: _init (tüm geçmişten, vektörel; t ve t-1 barlarındaki durum),
+# _step (tek bar ilerlet), _value (durumdan değer). Değerler taramalardaki
+# pandas tanımlarıyla aynıdır (ewm adjust=False/True, rolling mean/sum, fillna(50)).
+def _col(cols, field):
+    return cols[field] if field in cols else np.zeros(len(cols["CLOSING_TL"]))
+
+
+def _buffer(x, t, l):
+    return deque(x[max(0, t - l + 1):t + 1].tolist(), maxlen=l)
+
+
+def _init(spec, cols, ts):
+    kind, x = spec[0], cols["CLOSING_TL"]
+    if kind in ("ema", "rma"):
+        a = 2.0 / (spec[1] + 1) if kind == "ema" else 1.0 / spec[1]
+        y = recursive_filter(x, a)
+        return [{"y": float(y[t])} for t in ts]
+    if kind == "tema":
+        k = 1.0 - 2.0 / (spec[1] + 1)
+        w = lfilter([1.0], [1.0, -k], np.ones(len(x)))
+        s1 = lfilter([1.0], [1.0, -k], x)
+        s2 = lfilter([1.0], [1.0, -k], s1 / w)
+        s3 = lfilter([1.0], [1.0, -k], s2 / w)
+        return [{"w": float(w[t]), "s": [float(s1[t]), float(s2[t]), float(s3[t])]} for t in ts]
+    if kind == "rsi":
+        p = spec[1]
+        d = np.diff(x, prepend=x[0])  # pandas: ilk değişim NaN -> where(..., 0) ile 0
+        return [{"n": t + 1, "prev": float(x[t]), "up": _buffer(np.maximum(d, 0), t, p),
+                 "down": _buffer(-np.minimum(d, 0), t, p)} for t in ts]
+    if kind == "mfi":
+        p = spec[1]
+        if "VOLUME_TL" not in cols or "HIGH_TL" not in cols:
+            return [dict(st, rsi=True) for st in _init(("rsi", p), cols, ts)]
+        tp = (cols["HIGH_TL"] + cols["LOW_TL"] + x) / 3
+        rmf = tp * cols["VOLUME_TL"]
+        prev_tp = np.concatenate(([np.nan], tp[:-1]))
+        pos, neg = np.where(tp > prev_tp, rmf, 0), np.where(tp < prev_tp, rmf, 0)
+        return [{"n": t + 1, "tp": float(tp[t]), "pos": _buffer(pos, t, p), "neg": _buffer(neg, t, p)} for t in ts]
+    if kind == "sma":
+        v = _col(cols, spec[1])
+        return [{"n": t + 1, "buf": _buffer(v, t, spec[2])} for t in ts]
+    if kind == "channels":
+        out = [{"buf": _buffer(x, t, max(spec[1]))} for t in ts]
+        for st in out: st["val"] = calculate_channels(np.asarray(st["buf"]), spec[1])
+        return out
+    raise ValueError(f"Bilinmeyen indikatör: {spec}")
+
+
+def _step(spec, st, bar):
+    kind, x = spec[0], bar["CLOSING_TL"]
+    if kind in ("ema", "rma"):
+        a = 2.0 / (spec[1] + 1) if kind == "ema" else 1.0 / spec[1]
+        st["y"] += a * (x - st["y"])
+    elif kind == "tema":
+        k = 1.0 - 2.0 / (spec[1] + 1)
+        st["w"] = 1.0 + k * st["w"]
+        e = x
+        for i in range(3):
+            st["s"][i] = e + k * st["s"][i]
+            e = st["s"][i] / st["w"]
+    elif kind == "rsi" or (kind == "mfi" and st.get("rsi")):
+        d = x - st["prev"]
+        st["up"].append(max(d, 0.0)); st["down"].append(-min(d, 0.0))
+        st["prev"] = x; st["n"] += 1
+    elif kind == "mfi":
+        tp = (bar["HIGH_TL"] + bar["LOW_TL"] + x) / 3
+        rmf = tp * bar["VOLUME_TL"]
+        st["pos"].append(rmf if tp > st["tp"] else 0.0); st["neg"].append(rmf if tp < st["tp"] else 0.0)
+        st["tp"] = tp; st["n"] += 1
+    elif kind == "sma":
+        st["buf"].append(bar.get(spec[1], 0.0)); st["n"] += 1
+    elif kind == "channels":
+        st["buf"].append(x)
+        st["val"] = calculate_channels(np.asarray(st["buf"]), spec[1])
+
+
+def _ratio_index(a, b):
+    # 100 - 100 / (1 + a/b), boşlar (0/0, NaN) 50
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = 100 - (100 / (1 + np.float64(a) / np.float64(b)))
+    return 50.0 if np.isnan(v) else float(v)
+
+
+def _value(spec, st):
+    if st is None: return np.nan
+    kind = spec[0]
+    if kind in ("ema", "rma"): return st["y"]
+    if kind == "tema":
+        e1, e2, e3 = (s / st["w"] for s in st["s"])
+        return 3 * e1 - 3 * e2 + e3
+    if kind == "rsi" or (kind == "mfi" and st.get("rsi")):
+        if st["n"] < spec[1]: return 50.0
+        return _ratio_index(sum(st["up"]) / spec[1], sum(st["down"]) / spec[1])
+    if kind == "mfi":
+        if st["n"] < spec[1]: return 50.0
+        return _ratio_index(sum(st["pos"]), sum(st["neg"]))
+    if kind == "sma":
+        return sum(st["buf"]) / spec[2] if st["n"] >= spec[2] else np.nan
+    if kind == "channels":
+        return st["val"].copy()
+
+
+# ==================== DURUM DOSYASI ====================
+def _arrays(df):
+    return {c: df[c].to_numpy() for c in BAR_FIELDS if c in df.columns}
+
+
+def _columns(raw):
+    return {c: v.astype(float, copy=False) for c, v in raw.items() if c != "DATE"}
+
+
+def _bar_key(raw, i):
+    if i < 0: return None
+    return tuple(raw[c][i].item() if c in raw else None for c in BAR_FIELDS)
+
+
+def _fingerprint(raw, m):
+    """İlk m barın parmak izi: uzunluk + son FINGERPRINT_BARS bar (sabit maliyet)."""
+    h = hashlib.sha1(str(m).encode())
+    lo = max(m - FINGERPRINT_BARS, 0)
+    for c in BAR_FIELDS:
+        if c in raw: h.update(np.ascontiguousarray(raw[c][lo:max(m, 0)]).tobytes())
+    return h.hexdigest()
+
+
+def _same_bar(a, b):
+    if a is None or b is None: return a is b
+    return all(x == y or (isinstance(x, float) and isinstance(y, float) and np.isnan(x) and np.isnan(y))
+               for x, y in zip(a, b))
+
+
+def state_path(df):
+    """Durum dosyası: fiyat dosyasının yanındaki .durum klasörü (kaynak bilinmiyorsa None)."""
+    source, symbol = df.attrs.get("source"), df.attrs.get("symbol")
+    if not source or not symbol: return None
+    return os.path.join(os.path.dirname(source), STATE_DIR, f"{symbol}.pkl")
+
+
+def _load(path):
+    try: mtime = os.stat(path).st_mtime_ns
+    except OSError: return None
+    with _lock:
+        hit = _states.get(path)
+        if hit is not None and hit[0] == mtime: return hit[1]
+    try:
+        with open(path, "rb") as fh: state = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError): return None
+    if state.get("format") != STATE_FORMAT: return None
+    with _lock: _states[path] = (mtime, state)
+    return state
+
+
+def _path_lock(path):
+    with _lock: return _path_locks.setdefault(path, threading.Lock())
+
+
+def _save(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # eşzamanlı işler çakışmasın
+    with open(tmp, "wb") as fh: pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    with _lock: _states[path] = (os.stat(path).st_mtime_ns, state)
+
+
+def _rebuild(raw, specs):
+    n = len(raw["CLOSING_TL"])
+    cols = _columns(raw)
+    ts = [n - 1, n - 2] if n > 1 else [n - 1]
+    items = {}
+    for spec in specs:
+        cur_prev = _init(spec, cols, ts)
+        items[spec] = {"cur": cur_prev[0], "prev": cur_prev[1] if n > 1 else None}
+    return {"format": STATE_FORMAT, "n": n, "base": _fingerprint(raw, n - 2), "last": _bar_key(raw, n - 1),
+            "prev": _bar_key(raw, n - 2), "items": items}
+
+
+def _advance(state, raw, start):
+    """state'i start. bardan itibaren serinin sonuna kadar ilerletir."""
+    cols = _columns(raw)
+    n = len(raw["CLOSING_TL"])
+    for i in range(start, n):
+        bar = {c: float(v[i]) for c, v in cols.items()}
+        for spec, item in state["items"].items():
+            item["prev"] = copy.deepcopy(item["cur"])
+            _step(spec, item["cur"], bar)
+    state["n"] = n
+    state["base"] = _fingerprint(raw, n - 2)
+    state["last"], state["prev"] = _bar_key(raw, n - 1), _bar_key(raw, n - 2)
+
+
+class Snapshot:
+    """snapshot() sonucu: last(spec) son bardaki, prev(spec) bir önceki bardaki değer."""
+
+    def __init__(self, items):
+        self._items = items
+
+    def last(self, spec):
+        return _value(spec, self._items[spec]["cur"])
+
+    def prev(self, spec):
+        return _value(spec, self._items[spec]["prev"])
+
+    def ribbon(self, spans, prev, curr):
+        """indikatorler.ribbon_features ile aynı sözlük, EMA'lar durumdan."""
+        specs = [("ema", p) for p in spans]
+        return ribbon_summary(spans, [self.prev(s) for s in specs], [self.last(s) for s in specs], prev, curr)
+
+
+def snapshot(df, specs):
+    """df (yukleyici.load_stock_df çıktısı) için istenen indikatörlerin son iki
+    bardaki değerleri. Kalıcı durum yalnızca yeni barlar kadar ilerletilir;
+    durumu olmayan spec'ler bir kez tüm geçmişten kurulur.
+    Aynı hisseye eşzamanlı çağrılar hisse kilidinde sıralanır; önbellekteki
+    durum yerinde değiştirilmez (kopyası ilerletilip yerine konur), dönen
+    Snapshot'lar sonradan değişmez."""
+    specs = [tuple(s) for s in specs]
+    raw = _arrays(df)
+    n = len(df)
+    path = state_path(df)
+    if path is None or n == 0:
+        with _lock: _stats["fresh"] += 1
+        return Snapshot(_rebuild(raw, specs)["items"]) if n else None
+    with _path_lock(path): return _snapshot(path, raw, n, specs)
+
+
+def _snapshot(path, raw, n, specs):
+    state = _load(path)
+    if state is not None and state["n"] > n:
+        # Dilimlenmiş seri: hesapla ama kalıcı durumu bozma
+        with _lock: _stats["fresh"] += 1
+        return Snapshot(_rebuild(raw, specs)["items"])
+
+    changed = False
+    if state is not None and state["base"] != _fingerprint(raw, state["n"] - 2):
+        state = None  # eski barlar değişmiş
+    if state is not None and _same_bar(state["last"], _bar_key(raw, state["n"] - 1)):
+        if state["n"] < n:
+            with _lock: _stats["advanced"] += 1; _stats["bars"] += n - state["n"]
+            state = copy.deepcopy(state)
+            _advance(state, raw, state["n"]); changed = True
+    elif state is not None and state["n"] > 1 and _same_bar(state["prev"], _bar_key(raw, state["n"] - 2)):
+        # Son bar sonradan değişmiş: bir önceki durumdan yeniden oynat
+        state = copy.deepcopy(state)
+        for item in state["items"].values(): item["cur"], item["prev"] = item["prev"], None
+        with _lock: _stats["replayed"] += 1; _stats["bars"] += n - state["n"] + 1
+        _advance(state, raw, state["n"] - 1); changed = True
+    else:
+        state = None
+
+    missing = [s for s in specs if state is None or s not in state["items"]]
+    if state is None:
+        with _lock: _stats["rebuilt"] += 1
+        state = _rebuild(raw, specs); changed = True
+    elif missing:
+        state = dict(state, items={**state["items"], **_rebuild(raw, missing)["items"]}); changed = True
+    if changed: _save(path, state)
+    return Snapshot(state["items"])
+
+
+def stats():
+    with _lock: return dict(_stats)
+
+
+def summary():
+    s = stats()
+    return (f"İndikatör durumu: {s['advanced']} hisse ilerletildi ({s['bars']} bar), "
+            f"{s['replayed']} son bar yeniden oynatıldı, {s['rebuilt']} baştan kuruldu")
+
+
+def invalidate(symbol, data_dir=DATA_DIR):
+    """Hissenin durumunu siler; seri baştan yazıldığında (tam yenileme) çağrılır."""
+    path = os.path.join(data_dir, STATE_DIR, f"{symbol}.pkl")
+    with _lock: _states.pop(path, None)
+    try: os.remove(path); return True
+    except OSError: return False
+
+
+def clear(data_dir=DATA_DIR):
+    """Tüm kalıcı durumları siler (bir sonraki taramada yeniden kurulur)."""
+    d = os.path.join(data_dir, STATE_DIR)
+    removed = 0
+    if os.path.isdir(d):
+        for f in os.listdir(d):
+            try: os.remove(os.path.join(d, f)); removed += 1
+            except OSError: pass
+    with _lock: _states.clear()
+    return removed
+
+
+def benchmark(data_dir=DATA_DIR, specs=None):
+    """Tüm evrende: durumdan okuma ile tam geçmişten vektörel hesabı karşılaştırır."""
+    import yukleyici
+    specs = specs or [("ema", p) for p in (8, 13, 21, 34, 55, 89, 144, 233)] + \
+        [("rsi", 14), ("sma", "VOLUME_TL", 10), ("channels", (55, 89, 144, 233, 377, 610, 987))]
+    symbols = fiyat_deposu.list_symbols(data_dir)
+    frames = [df for df in (yukleyici.load_stock_df(s, data_dir) for s in symbols) if df is not None]
+    t0 = time.perf_counter()
+    for df in frames: Snapshot(_rebuild(_arrays(df), specs)["items"]).last(specs[-1])
+    t_full = time.perf_counter() - t0
+    for df in frames: snapshot(df, specs)  # durumlar hazır olsun
+    t0 = time.perf_counter()
+    for df in frames: snapshot(df, specs).last(specs[-1])
+    t_state = time.perf_counter() - t0
+    print(f"{len(frames)} hisse, {len(specs)} indikatör: tam hesap {t_full:.2f} sn, durumdan {t_state:.2f} sn "
+          f"(x{t_full / t_state:.0f})")
+    print(summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kalıcı artımlı indikatör durumu")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("bench", help="Durumdan okuma ile tam hesabı karşılaştır")
+    sub.add_parser("clear", help="Kalıcı durumları sil")
+    args = parser.parse_args()
+    if args.cmd == "bench": benchmark()
+    elif args.cmd == "clear": print(f"{clear()} durum dosyası silindi.")
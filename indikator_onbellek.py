@@ -0,0 +1,151 @@
+import os
+import glob
+import pickle
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import fiyat_deposu
+from indikatorler import calculate_hull, calculate_custom_tema, calculate_rsi, calculate_wma
+
+# --- İNDİKATÖR ÖNBELLEĞİ ---
+# Aynı hissenin aynı verisi için aynı indikatör (Hull 89, TEMA 34/68, RSI 14...)
+# bir tarama + panel oturumunda bir kez hesaplansın diye. Anahtar:
+# (hisse, veri sürümü, sütun, pencere, indikatör, parametreler). Hisse ve veri
+# sürümü yukleyici'nin DataFrame'e koyduğu attrs'tan gelir; pencere (uzunluk,
+# ilk/son index, son değer, toplam) dilimlenmiş veya değiştirilmiş seriyi ayırır.
+# attrs'ı olmayan seriler (ör. canlı indirilen veri) önbelleğe girmeden hesaplanır.
+CACHE_MAX_BYTES = int(os.environ.get("INDIKATOR_MAX_MB", "128")) * 1024 * 1024
+SPILL_DIR = os.environ.get("INDIKATOR_SPILL_DIR") or None  # tahliye edilen kayıtlar diske
+
+_cache = OrderedDict()  # anahtar -> (değer, bayt)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0, "disk_hits": 0, "spills": 0, "uncached": 0}
+
+
+def configure(max_mb=None, spill_dir=None):
+    """Bellek sınırını (MB) ve disk taşma klasörünü değiştirir (spill_dir='' kapatır)."""
+    global CACHE_MAX_BYTES, SPILL_DIR
+    if max_mb is not None: CACHE_MAX_BYTES = int(max_mb * 1024 * 1024)
+    if spill_dir is not None: SPILL_DIR = spill_dir or None
+
+
+def _key(s, name, params):
+    attrs = getattr(s, "attrs", {})
+    symbol, version = attrs.get("symbol"), attrs.get("version")
+    column = getattr(s, "name", None)
+    if symbol is None or version is None or column not in fiyat_deposu.COLUMNS or len(s) == 0: return None
+    values = s.to_numpy(dtype=float, copy=False)
+    window = (len(s), s.index[0], s.index[-1], float(values[-1]), float(np.nansum(values)))
+    return (symbol, version, column, window, name, params)
+
+
+def _size(value):
+    if isinstance(value, (pd.Series, pd.DataFrame)): return int(np.sum(value.memory_usage(index=True, deep=False)))
+    return int(getattr(value, "nbytes", 0))
+
+
+def _share(value):
+    # Sığ kopya: çağıran değiştirse bile önbellekteki kayıt bozulmaz (CoW)
+    return value.copy(deep=False) if isinstance(value, (pd.Series, pd.DataFrame)) else value
+
+
+def _spill_path(key):
+    return os.path.join(SPILL_DIR, hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+
+
+def _put(key, value):
+    size = _size(value)
+    spilled = []
+    with _lock:
+        if size > CACHE_MAX_BYTES: return
+        _cache[key] = (value, size)
+        _stats["bytes"] += size
+        while _stats["bytes"] > CACHE_MAX_BYTES and _cache:
+            k, (v, b) = _cache.popitem(last=False)
+            _stats["bytes"] -= b
+            _stats["evictions"] += 1
+            if SPILL_DIR: spilled.append((k, v))
+    for k, v in spilled:
+        try:
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            with open(_spill_path(k), "wb") as fh: pickle.dump(v, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            with _lock: _stats["spills"] += 1
+        except OSError: pass
+
+
+def _from_disk(key):
+    if not SPILL_DIR: return None
+    try:
+        with open(_spill_path(key), "rb") as fh: return pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError): return None
+
+
+def memoize(s, name, params, compute):
+    """s için name(params) sonucunu önbellekten verir, yoksa compute() ile hesaplar."""
+    key = _key(s, name, params)
+    if key is None:
+        with _lock: _stats["uncached"] += 1
+        return compute()
+    with _lock:
+        item = _cache.get(key)
+        if item is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return _share(item[0])
+    value = _from_disk(key)
+    if value is not None:
+        with _lock: _stats["disk_hits"] += 1
+    else:
+        value = compute()
+        with _lock: _stats["misses"] += 1
+    _put(key, value)
+    return _share(value)
+
+
+def memoized(name, func):
+    """func(seri, *parametreler) için önbellekli sürüm; varsayılanlar anahtara
+    dahil edilir, böylece rsi(c) ile rsi(c, 14) aynı kayda düşer."""
+    sig = inspect.signature(func)
+
+    def wrapper(s, *args, **kwargs):
+        bound = sig.bind(s, *args, **kwargs)
+        bound.apply_defaults()
+        params = tuple(bound.arguments.items())[1:]
+        return memoize(s, name, params, lambda: func(s, *args, **kwargs))
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+# Taramaların ve panelin ortak kullandığı indikatörler
+hull = memoized("hull", calculate_hull)
+tema = memoized("tema", calculate_custom_tema)
+rsi = memoized("rsi", calculate_rsi)
+wma = memoized("wma", calculate_wma)
+
+
+def cache_info():
+    """İsabet/ıska/tahliye sayıları, tutulan bayt, disk isabeti ve taşmaları."""
+    with _lock:
+        info = dict(_stats, entries=len(_cache), max_bytes=CACHE_MAX_BYTES, spill_dir=SPILL_DIR)
+    total = info["hits"] + info["disk_hits"] + info["misses"]
+    info["hit_rate"] = (info["hits"] + info["disk_hits"]) / total if total else 0.0
+    return info
+
+
+def cache_summary():
+    i = cache_info()
+    disk = f", disk isabet {i['disk_hits']}, taşma {i['spills']}" if i["spill_dir"] else ""
+    return (f"İndikatör önbelleği: {i['entries']} kayıt, {i['bytes'] / 1024 / 1024:.1f}/{i['max_bytes'] / 1024 / 1024:.0f} MB, "
+            f"isabet {i['hits']}, ıska {i['misses']} (%{i['hit_rate'] * 100:.0f}), tahliye {i['evictions']}{disk}")
+
+
+def clear_cache(disk=False):
+    with _lock:
+        _cache.clear()
+        _stats.update(dict.fromkeys(_stats, 0))
+    if disk and SPILL_DIR:
+        for f in glob.glob(os.path.join(SPILL_DIR, "*.pkl")): os.remove(f)
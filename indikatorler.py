@@ -0,0 +1,534 @@
+import os
+import time
+import math
+import argparse
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# ==================== ORTAK İNDİKATÖR KÜTÜPHANESİ ====================
+# Taramaların ve panelin paylaştığı vektörel hesaplar. Girdi pd.Series ise
+# aynı index ile Series, ndarray ise ndarray döner. Pencere içinde NaN olan
+# barlar, eski rolling(...).apply(...) davranışındaki gibi NaN kalır.
+# _window_sums ve calculate_wma 2 boyutlu dizide (bar x hisse) sütun sütun çalışır.
+
+
+def _as_array(s):
+    return np.asarray(s, dtype=float)
+
+
+def _like(s, values):
+    return pd.Series(values, index=s.index) if isinstance(s, pd.Series) else values
+
+
+def _window_sums(v, l):
+    """v'nin (NaN'sız) l uzunluklu kayan toplamları (0. eksende); sonuç uzunluğu len(v) - l + 1."""
+    c = np.cumsum(v, axis=0)
+    c = np.concatenate((np.zeros((1,) + c.shape[1:]), c))
+    return c[l:] - c[:-l]
+
+
+def _nan_windows(nan, l):
+    """İçinde en az bir NaN olan pencereler (pencere sonuna göre, uzunluk len - l + 1)."""
+    return _window_sums(nan.astype(float), l) > 0
+
+
+# ==================== WMA / HULL ====================
+def calculate_wma(s, l):
+    """Doğrusal ağırlıklı ortalama (ağırlıklar 1..l, en yeni bar l), O(n).
+
+    Kümülatif toplam özdeşliği: pencere sonu t için
+    sum((i - (t-l)) * x_i) = sum(i * x_i) - (t-l) * sum(x_i).
+    """
+    x = _as_array(s)
+    n = len(x)
+    out = np.full(x.shape, np.nan)
+    l = int(l)
+    if l < 1 or n < l: return _like(s, out)
+    nan = np.isnan(x)
+    v = np.where(nan, 0.0, x)
+    i = np.arange(n, dtype=float).reshape((-1,) + (1,) * (x.ndim - 1))
+    t = i[l - 1:]
+    s1 = _window_sums(v, l)
+    s2 = _window_sums(i * v, l)
+    out[l - 1:] = (s2 - (t - l) * s1) / (l * (l + 1) / 2)
+    if nan.any(): out[l - 1:][_nan_windows(nan, l)] = np.nan
+    return _like(s, out)
+
+
+def calculate_hma(s, period=89):
+    """Hull MA: WMA(2*WMA(n/2) - WMA(n), sqrt(n))."""
+    w_half = calculate_wma(s, int(period / 2))
+    w_full = calculate_wma(s, period)
+    return calculate_wma(2 * w_half - w_full, int(np.sqrt(period)))
+
+
+calculate_hull = calculate_hma  # panel ve kombine taramadaki eski ad
+
+
+# ==================== ÖZYİNELİ (BİRİNCİ DERECE) FİLTRELER ====================
+def lfilter(*args, **kwargs):
+    """scipy.signal.lfilter. scipy.signal'in içe aktarımı ~1.5 sn sürdüğü için
+    modül yüklenirken değil, ilk filtrede yüklenir (panel/CLI açılışı hızlanır)."""
+    from scipy.signal import lfilter as _lfilter
+    return _lfilter(*args, **kwargs)
+
+
+# y[i] = y[i-1] + a[i] * (x[i] - y[i-1]), y[start] = x[start]. start öncesi
+# NaN; x veya a'daki bir NaN, eski bar bar döngülerdeki gibi sonrasına yayılır.
+_LOG_LIMIT = 600.0  # parça içi çarpım en fazla e^-600'e insin (taşma yok)
+
+
+def recursive_filter(s, alpha, start=0):
+    """Birinci derece özyineli filtre. alpha sabitse scipy lfilter (C döngüsü);
+    bar başına alpha dizisiyse (KAMA gibi) parçalı kapalı form kullanılır."""
+    x = _as_array(s)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n <= start: return _like(s, out)
+    out[start] = x[start]
+    if np.ndim(alpha) == 0:
+        a = float(alpha)
+        out[start + 1:] = lfilter([a], [1.0, a - 1.0], x[start + 1:], zi=[(1.0 - a) * x[start]])[0]
+    else:
+        a = _as_array(alpha)
+        _variable_filter(x[start + 1:], a[start + 1:], x[start], out[start + 1:])
+    return _like(s, out)
+
+
+def _variable_filter(x, a, y0, out):
+    """Değişken alpha için parçalı çözüm (out yerinde doldurulur).
+
+    Bir parça içinde P_j = prod(1 - a_k) ile y_j = P_j * (y0 + sum(a_k x_k / P_k)).
+    P sıfıra yaklaşmasın diye parçalar -log(1 - a) toplamı _LOG_LIMIT'i
+    aşmadan kesilir; her parça bir öncekinin son değeriyle başlar.
+    """
+    keep = np.maximum(1.0 - a, 1e-300)
+    cost = np.cumsum(-np.log(np.where(np.isnan(keep), 1.0, keep)))
+    i, n = 0, len(x)
+    while i < n:
+        base = cost[i - 1] if i else 0.0
+        j = max(int(np.searchsorted(cost, base + _LOG_LIMIT, side="right")), i + 1)
+        p = np.cumprod(keep[i:j])
+        out[i:j] = p * (y0 + np.cumsum(a[i:j] * x[i:j] / p))
+        y0 = out[j - 1]
+        i = j
+    return out
+
+
+def calculate_rma(s, l):
+    """Wilder RMA (alpha = 1/l), ilk değer tohum."""
+    return recursive_filter(s, 1.0 / l)
+
+
+def calculate_kama(s, period=5, fast=2, slow=30):
+    """Kaufman uyarlanır ortalama: verim oranına göre bar başına alpha."""
+    x = pd.Series(_as_array(s))
+    change = x.diff(period).abs()
+    volatility = x.diff().abs().rolling(period).sum()
+    fast_sc, slow_sc = 2 / (fast + 1), 2 / (slow + 1)
+    sc = ((change / volatility) * (fast_sc - slow_sc) + slow_sc) ** 2
+    return _like(s, recursive_filter(x.to_numpy(), sc.to_numpy(), start=period - 1))
+
+
+# ==================== ORTAK OSİLATÖR VE ORTALAMALAR ====================
+# Birden çok tarama ve panelde birebir aynı tanımla kullanılanlar; önbellek
+# (indikator_onbellek) anahtarı ada göre tuttuğu için tek yerde durmalılar.
+def calculate_rsi(s, p=14):
+    """Basit ortalamalı RSI (kazanç/kayıp rolling mean), boş değerler 50."""
+    x = s if isinstance(s, pd.Series) else pd.Series(_as_array(s))
+    d = x.diff()
+    g = d.where(d > 0, 0).rolling(p).mean()
+    l = -d.where(d < 0, 0).rolling(p).mean()
+    out = (100 - (100 / (1 + g / l))).fillna(50)
+    return out if isinstance(s, pd.Series) else out.to_numpy()
+
+
+def calculate_custom_tema(s, p):
+    """Panel ve 3'lü taramadaki TEMA: 3*E1 - 3*E2 + E3 (ewm span, adjust=True)."""
+    x = s if isinstance(s, pd.Series) else pd.Series(_as_array(s))
+    e1 = x.ewm(span=p).mean(); e2 = e1.ewm(span=p).mean(); e3 = e2.ewm(span=p).mean()
+    out = 3 * e1 - 3 * e2 + e3
+    return out if isinstance(s, pd.Series) else out.to_numpy()
+
+
+# ==================== EMA ŞERİDİ ====================
+# Taramaların ortak 8'li EMA şeridi (ewm(span, adjust=False) ile aynı).
+EMA_RIBBON = [8, 13, 21, 34, 55, 89, 144, 233]
+
+
+def _ema_weights(spans, n):
+    """(P, n) kapalı form ağırlıkları: W @ x[:n] her span için n. barın EMA'sı.
+    y = (1-a)^(n-1) x_0 + sum a (1-a)^(n-1-i) x_i (ilk değer tohum)."""
+    a = (2.0 / (np.asarray(spans, dtype=float) + 1))[:, None]
+    w = a * (1.0 - a) ** np.arange(n - 1, -1, -1, dtype=float)[None, :]
+    if n: w[:, 0] = (1.0 - a[:, 0]) ** (n - 1)
+    return w
+
+
+def ema_ribbon(s, spans=EMA_RIBBON):
+    """Tüm span'lerin EMA matrisi (n, P); Series girdide sütunları span olan DataFrame."""
+    x = _as_array(s)
+    out = np.full((len(x), len(spans)), np.nan)
+    for j, p in enumerate(spans): out[:, j] = recursive_filter(x, 2.0 / (p + 1))
+    return pd.DataFrame(out, index=s.index, columns=list(spans)) if isinstance(s, pd.Series) else out
+
+
+def ribbon_tail(s, spans=EMA_RIBBON, k=2):
+    """Şeridin yalnızca son k satırı, (k, P): tüm seriyi süzmek yerine satır
+    başına tek matris çarpımı. x 2 boyutluysa (bar x hisse) sonuç (k, P, N).
+    k'dan kısa serilerde eksik satırlar NaN."""
+    x = _as_array(s)
+    n = len(x)
+    out = np.full((k, len(spans)) + x.shape[1:], np.nan)
+    for i in range(k):
+        m = n - (k - 1 - i)
+        if m > 0: out[i] = _ema_weights(spans, m) @ x[:m]
+    return out
+
+
+def ribbon_features(s, spans=EMA_RIBBON):
+    """Şeritten tarayıcıların ortak ölçüleri (tek seferde):
+    'last'/'prev' {span: EMA}, 'ideal_up' (fiyat > EMA1 > EMA2 > ...), 'up'
+    (fiyat tüm EMA'ların üstünde), 'crossed' (bugün yukarı kesilen span'ler),
+    'distance' {span: fiyatın EMA'ya uzaklığı %}."""
+    x = _as_array(s)
+    prev_e, last_e = ribbon_tail(x, spans, 2)
+    return ribbon_summary(spans, prev_e, last_e, x[-2] if len(x) > 1 else np.nan, x[-1])
+
+
+def ribbon_summary(spans, prev_e, last_e, prev, curr):
+    """ribbon_features'ın hesap kısmı: EMA'ların son iki değeri ve son iki
+    fiyattan ölçüler (EMA'lar başka yerden, ör. kalıcı durumdan geliyorsa)."""
+    prev_e, last_e = np.asarray(prev_e, dtype=float), np.asarray(last_e, dtype=float)
+    return {
+        'last': dict(zip(spans, last_e)),
+        'prev': dict(zip(spans, prev_e)),
+        'ideal_up': bool(curr > last_e[0] and np.all(last_e[:-1] > last_e[1:])),
+        'up': bool(np.all(curr > last_e)),
+        'crossed': [p for p, e0, e1 in zip(spans, prev_e, last_e) if prev < e0 and curr > e1],
+        'distance': {p: (curr - e) / e * 100 for p, e in zip(spans, last_e)},
+    }
+
+
+# ==================== QnR (NADARAYA-WATSON) ÇEKİRDEK ====================
+@lru_cache(maxsize=32)
+def _qnr_weights(h, r, x0):
+    w = np.array([math.pow(1 + (i * i) / (h * h * 2 * r), -r) for i in range(x0 + 1)])
+    w.flags.writeable = False
+    return w
+
+
+def qnr_weights(h=23, r=23, x0=23):
+    """Rasyonel kuadratik ağırlıklar, gecikme sırasıyla (0 = o anki bar).
+    (h, r, x0) başına bir kez hesaplanır; dönen dizi salt okunur."""
+    return _qnr_weights(float(h), float(r), int(x0))
+
+
+def calculate_qnr(s, h=23, r=23, x0=23):
+    """QnR çekirdek tahmini, tüm seri için tek konvolüsyon: her bar t için
+    sum(w_j * x[t-j]) / sum(w_j), j = 0..x0. İlk x0 bar NaN."""
+    x = _as_array(s)
+    w = qnr_weights(h, r, x0)
+    out = np.full(len(x), np.nan)
+    if len(x) > x0: out[x0:] = np.convolve(x, w / w.sum(), mode="valid")
+    return _like(s, out)
+
+
+def qnr_point(s, idx=-1, h=23, r=23, x0=23):
+    """Tek barın QnR değeri (yalnızca son x0+1 bar, tek nokta çarpımı).
+    Yeterli geçmiş yoksa NaN."""
+    x = _as_array(s)
+    idx = idx + len(x) if idx < 0 else idx
+    if idx < x0 or idx >= len(x): return np.nan
+    w = qnr_weights(h, r, x0)
+    return float(np.dot(w, x[idx - x0:idx + 1][::-1]) / w.sum())
+
+
+# ==================== KAYAN DOĞRUSAL REGRESYON ====================
+# Tüm regresyon/Pearson hesapları tek bir önek toplamı kümesinden çıkar:
+# y, y^2, i*y ve NaN sayısının kümülatif toplamları. Herhangi bir [a, b]
+# penceresinin toplamları iki farkla bulunur, pencere uzunluğu ne olursa olsun.
+def _prefix_sums(y):
+    """(ref, {ad: kümülatif toplam}) — y sayısal kararlılık için ref kadar kaydırılır."""
+    nan = np.isnan(y)
+    ref = np.nanmean(y) if not nan.all() else 0.0
+    v = np.where(nan, 0.0, y - ref)
+    i = np.arange(len(y), dtype=float)
+    sums = {k: np.concatenate(([0.0], np.cumsum(a)))
+            for k, a in (("y", v), ("yy", v * v), ("iy", i * v), ("nan", nan.astype(float)))}
+    return ref, sums
+
+
+FLAT_RTOL = 1e-10  # varyans / (kaydırılmış) kareler toplamı bunun altındaysa pencere sabit
+
+
+def _fit_windows(ref, sums, l, ends):
+    """Son indeksi ends olan l uzunluklu pencerelerin doğru uydurması.
+
+    l ve ends skaler ya da aynı boyda dizi olabilir (çok vade tek seferde).
+    x = 0..l-1 (pencere başı 0). Sütunlar: 'lsma' (doğrunun son bardaki
+    değeri), 'slope', 'intercept' (x=0'daki değer), 'std' (artıkların
+    standart sapması, ddof=0), 'pearson' (x ile y korelasyonu, np.corrcoef
+    ile aynı). NaN içeren ve sabit (varyanssız) pencerelerde Pearson NaN;
+    sabit pencerede eğim ve std 0. Farklı toplamlar yuvarlama artığı bırakır,
+    sabitlik bu yüzden göreli eşikle (FLAT_RTOL) anlaşılır.
+    """
+    l = np.asarray(l, dtype=float)
+    lo, hi = (ends - l + 1).astype(int), ends + 1
+    part = {k: c[hi] - c[lo] for k, c in sums.items()}
+    sy = part["y"]
+    sx = l * (l - 1) / 2
+    sxx_c = l * (l * l - 1) / 12  # sum((x - x_ort)^2)
+    sxy_c = part["iy"] - lo * sy - sx * sy / l
+    syy_c = np.maximum(part["yy"] - sy * sy / l, 0.0)
+    flat = syy_c <= FLAT_RTOL * part["yy"]
+    syy_c, sxy_c = np.where(flat, 0.0, syy_c), np.where(flat, 0.0, sxy_c)
+    slope = sxy_c / sxx_c
+    intercept = (sy - slope * sx) / l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pearson = np.where(flat, np.nan, sxy_c / np.sqrt(sxx_c * syy_c))
+    cols = {
+        "lsma": intercept + slope * (l - 1) + ref,
+        "slope": slope,
+        "intercept": intercept + ref,
+        "std": np.sqrt(np.maximum(syy_c - slope * sxy_c, 0.0) / l),
+        "pearson": np.clip(pearson, -1.0, 1.0),
+    }
+    bad = part["nan"] > 0
+    if bad.any():
+        for c in cols.values(): c[bad] = np.nan
+    return cols
+
+
+def calculate_linreg(s, l):
+    """Her bar için son l barın en küçük kareler doğrusu ve Pearson'u, O(n).
+
+    Sütunlar _fit_windows ile aynı ('lsma' np.polyfit + polyval ile aynı);
+    ilk l-1 bar ve NaN içeren pencereler NaN.
+    """
+    y = _as_array(s)
+    n = len(y)
+    cols = {c: np.full(n, np.nan) for c in ("lsma", "slope", "intercept", "std", "pearson")}
+    l = int(l)
+    if l >= 2 and n >= l:
+        ref, sums = _prefix_sums(y)
+        for c, v in _fit_windows(ref, sums, l, np.arange(l - 1, n)).items(): cols[c][l - 1:] = v
+    return pd.DataFrame(cols, index=s.index if isinstance(s, pd.Series) else None)
+
+
+def calculate_channels(s, horizons, width=2.0):
+    """Son bar için birden çok vadenin regresyon kanalı tek geçişte.
+
+    Satırlar vade (index), sütunlar _fit_windows'unkiler + 'upper'/'lower'
+    (lsma ± width * std). Seriden uzun vadelerin satırı NaN. Önek toplamları
+    yalnızca en uzun vadenin kuyruğu üzerinden bir kez alınır.
+    """
+    y = _as_array(s)
+    n = len(y)
+    h = np.array([int(v) for v in horizons])
+    cols = {c: np.full(len(h), np.nan) for c in ("pearson", "slope", "intercept", "lsma", "std")}
+    ok = (h >= 2) & (h <= n)
+    if ok.any():
+        tail = y[n - h[ok].max():]
+        ref, sums = _prefix_sums(tail)
+        for c, v in _fit_windows(ref, sums, h[ok], np.full(ok.sum(), len(tail) - 1)).items(): cols[c][ok] = v
+    cols["upper"] = cols["lsma"] + width * cols["std"]
+    cols["lower"] = cols["lsma"] - width * cols["std"]
+    return pd.DataFrame(cols, index=pd.Index(h, name="vade"))
+
+
+def calculate_channel_series(s, horizons, width=2.0):
+    """Her vade için tüm geçmiş barların kanalı: {vade: calculate_linreg sütunları + upper/lower}.
+
+    Tüm vadeler aynı önek toplamlarını paylaşır (vade başına yeniden toplama yok).
+    """
+    y = _as_array(s)
+    n = len(y)
+    index = s.index if isinstance(s, pd.Series) else None
+    ref, sums = _prefix_sums(y)
+    out = {}
+    for h in horizons:
+        h = int(h)
+        cols = {c: np.full(n, np.nan) for c in ("lsma", "slope", "intercept", "std", "pearson")}
+        if 2 <= h <= n:
+            for c, v in _fit_windows(ref, sums, h, np.arange(h - 1, n)).items(): cols[c][h - 1:] = v
+        df = pd.DataFrame(cols, index=index)
+        df["upper"] = df["lsma"] + width * df["std"]
+        df["lower"] = df["lsma"] - width * df["std"]
+        out[h] = df
+    return out
+
+
+def calculate_pearson(s, l):
+    """Kayan Pearson serisi: her bar için son l barın zamanla korelasyonu."""
+    return _like(s, calculate_linreg(s, l)["pearson"].to_numpy())
+
+
+def calculate_lsma(s, l):
+    """En küçük kareler hareketli ortalaması (pencere doğrusunun son bardaki değeri)."""
+    return _like(s, calculate_linreg(s, l)["lsma"].to_numpy())
+
+
+def calculate_zlsma(s, l):
+    """Sıfır gecikmeli LSMA: LSMA + (LSMA - LSMA(LSMA))."""
+    lsma = calculate_lsma(s, l)
+    return 2 * lsma - calculate_lsma(lsma, l)
+
+
+# ==================== KUYRUK (WARM-UP) DEĞERLENDİRMESİ ====================
+# Taramaların çoğu indikatörün yalnızca son bir iki değerine bakar. Kayan
+# pencereler (SMA/WMA/regresyon/quantile) L bardan sonra tam aynıdır; özyineli
+# filtreler (EMA/SMMA/KAMA) ise başlangıcı unutmak için bar ister: m ardışık
+# EMA'da başlangıç etkisi ~ C(k+m-1, m-1) (1-a)^k. TAIL_TOL None ise tüm
+# geçmiş kullanılır (varsayılan); sayıysa tarama motoru her tarayıcının
+# warmup(tol) ile bildirdiği kadar son barı keser. tol, başlangıç sapmasına
+# göre göreli hatadır; `tarama_motoru.py tail` tam geçmişle farkı ölçer.
+TAIL_TOL = float(os.environ.get("INDIKATOR_KUYRUK_TOL", "0")) or None
+TAIL_MARGIN = 2  # son iki barı (iloc[-2], diff) kullananlar için pay
+
+
+def set_tail_tolerance(tol):
+    """Kuyruk modunu açar (tol > 0) veya kapatır (None/0)."""
+    global TAIL_TOL
+    TAIL_TOL = float(tol) if tol else None
+
+
+@lru_cache(maxsize=256)
+def _ema_warmup(alpha, stages, tol):
+    la, lt = math.log1p(-alpha), math.log(tol)
+    k = max(1, int(lt / la))
+    while math.lgamma(k + stages) - math.lgamma(k + 1) - math.lgamma(stages) + k * la > lt: k += 1
+    return k
+
+
+def ema_warmup(span=None, alpha=None, stages=1, tol=None):
+    """EMA (span) veya alpha'lı özyineli filtrenin `stages` kez art arda
+    uygulanmasında başlangıç etkisinin tol altına indiği bar sayısı."""
+    tol = tol or TAIL_TOL or 1e-9
+    a = alpha if alpha is not None else 2.0 / (span + 1)
+    return _ema_warmup(float(a), int(stages), float(tol))
+
+
+def kama_warmup(fast=2, slow=30, tol=None):
+    """KAMA için en yavaş sabitle (verimlilik 0) en kötü durum."""
+    return ema_warmup(alpha=(2.0 / (slow + 1)) ** 2, tol=tol)
+
+
+def tail_bars(s, bars):
+    """s'nin son bars (+TAIL_MARGIN) barı; seri zaten kısaysa kendisi."""
+    n = bars + TAIL_MARGIN
+    if n >= len(s): return s
+    return s.iloc[-n:] if isinstance(s, (pd.Series, pd.DataFrame)) else s[-n:]
+
+
+# ==================== ÖLÇÜM ====================
+def _wma_apply(s, l):
+    # Eski uygulama: bar başına Python çağrısı (yalnızca karşılaştırma için)
+    w = np.arange(1, l + 1)
+    return s.rolling(l).apply(lambda x: np.dot(x, w) / w.sum(), raw=True)
+
+
+def _hma_apply(s, period):
+    w1 = _wma_apply(s, int(period / 2)); w2 = _wma_apply(s, period)
+    return _wma_apply(2 * w1 - w2, int(np.sqrt(period)))
+
+
+def _rma_loop(s, l):
+    # Eski super_tarama_v2 döngüsü
+    alpha = 1 / l; rma = np.zeros_like(s); rma[0] = s[0]
+    for i in range(1, len(s)): rma[i] = alpha * s[i] + (1 - alpha) * rma[i - 1]
+    return rma
+
+
+def _kama_loop(s, period=5):
+    # Eski expert_ma.calculate_ama döngüsü
+    change = s.diff(period).abs()
+    volatility = s.diff().abs().rolling(period).sum()
+    sc = ((change / volatility) * (2 / (2 + 1) - 2 / (30 + 1)) + 2 / (30 + 1)) ** 2
+    ama = np.full(len(s), np.nan); ama[period - 1] = s.iloc[period - 1]
+    values, sc_values = s.values, sc.values
+    for i in range(period, len(s)):
+        if not np.isnan(sc_values[i]): ama[i] = ama[i - 1] + sc_values[i] * (values[i] - ama[i - 1])
+    return ama
+
+
+def _qnr_loop(s, h=23, r=23, x0=23):
+    # Eski super_3_1.get_kernel_point: her barda ağırlıkları yeniden kurar
+    out = np.full(len(s), np.nan)
+    for idx in range(x0, len(s)):
+        w = np.array([math.pow(1 + (math.pow(i, 2) / ((math.pow(h, 2) * 2 * r))), -r) for i in range(x0 + 1)])[::-1]
+        out[idx] = np.sum(s.iloc[idx - x0:idx + 1].values * w) / np.sum(w)
+    return out
+
+
+def _ewm_last(close, spans):
+    # Eski yol: her span için ayrı ewm, son ve önceki satır
+    return [(e.iloc[-2], e.iloc[-1]) for e in (close.ewm(span=p, adjust=False).mean() for p in spans)]
+
+
+def _lsma_apply(s, l):
+    x = np.arange(l)
+    return s.rolling(l).apply(lambda y: np.polyval(np.polyfit(x, y, 1), l - 1), raw=True)
+
+
+def _pearson_tails(close, horizons):
+    # Eski uygulama: her vade için kuyruğu kesip np.corrcoef (sabit kuyrukta NaN;
+    # corrcoef orada kendi yuvarlama artığıyla bazen 0 döner)
+    tails = [close.tail(h).values for h in horizons]
+    return [np.nan if np.ptp(y) == 0 else np.corrcoef(np.arange(len(y)), y)[0, 1] for y in tails]
+
+
+def _bench(name, old, new, n, repeat):
+    t0 = time.perf_counter(); ref = old()
+    t_old = time.perf_counter() - t0
+    new()  # ısınma: tembel içe aktarımlar (scipy.signal) ölçüme girmesin
+    t0 = time.perf_counter()
+    for _ in range(repeat): res = new()
+    t_new = (time.perf_counter() - t0) / repeat
+    diff = np.nanmax(np.abs(np.asarray(res) - np.asarray(ref)))
+    same_nan = np.array_equal(np.isnan(np.asarray(res)), np.isnan(np.asarray(ref)))
+    print(f"  {name:<22} eski {n / t_old:12,.0f} bar/sn   yeni {n / t_new:14,.0f} bar/sn   "
+          f"x{t_old / t_new:8.0f}   maks fark {diff:.2e}  NaN {'aynı' if same_nan else 'FARKLI'}")
+
+
+def benchmark(n=2500, repeat=200, seed=0):
+    """n barlık rastgele yürüyüş üzerinde eski rolling.apply ile vektörel sürümü karşılaştırır."""
+    rng = np.random.default_rng(seed)
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    print(f"Ölçüm: {n} bar, yeni sürüm {repeat} tekrar ortalaması")
+    for l in (10, 89, 196):
+        _bench(f"WMA({l})", lambda: _wma_apply(close, l), lambda: calculate_wma(close, l), n, repeat)
+    for p in (89, 144, 196):
+        _bench(f"HMA({p})", lambda: _hma_apply(close, p), lambda: calculate_hma(close, p), n, repeat)
+    gain = np.maximum(np.diff(close.values, prepend=close.values[0]), 0)
+    _bench("RMA(13)", lambda: _rma_loop(gain, 13), lambda: calculate_rma(gain, 13), n, repeat)
+    _bench("KAMA(5)", lambda: _kama_loop(close), lambda: calculate_kama(close, 5), n, repeat)
+    flat = close.copy(); flat.iloc[n // 2:n // 2 + 8] = flat.iloc[n // 2]  # sc NaN -> sonrası NaN
+    _bench("KAMA(5) düz bölge", lambda: _kama_loop(flat), lambda: calculate_kama(flat, 5), n, repeat)
+    _bench("QnR(23,23,23)", lambda: _qnr_loop(close), lambda: calculate_qnr(close), n, repeat)
+    _bench("EMA şeridi x8 (tam)", lambda: pd.concat([close.ewm(span=p, adjust=False).mean() for p in EMA_RIBBON], axis=1),
+           lambda: ema_ribbon(close), n, repeat)
+    _bench("EMA şeridi x8 (son 2)", lambda: np.array(_ewm_last(close, EMA_RIBBON)).T,
+           lambda: ribbon_tail(close), n, repeat)
+    for l in (105, 173):
+        _bench(f"LSMA({l})", lambda: _lsma_apply(close, l), lambda: calculate_lsma(close, l), n, repeat)
+    _bench("ZLSMA(173)", lambda: (lambda a: 2 * a - _lsma_apply(a, 173))(_lsma_apply(close, 173)),
+           lambda: calculate_zlsma(close, 173), n, repeat)
+    horizons = [55, 89, 144, 233, 377, 610, 987]
+    _bench("Pearson x7 (son bar)", lambda: _pearson_tails(close, horizons),
+           lambda: calculate_channels(close, horizons)["pearson"].to_numpy(), n, repeat)
+    flat_tail = close.copy(); flat_tail.iloc[-300:] = flat_tail.iloc[-300]  # sabit kuyruk: Pearson NaN olmalı
+    _bench("Pearson sabit kuyruk", lambda: _pearson_tails(flat_tail, horizons),
+           lambda: calculate_channels(flat_tail, horizons)["pearson"].to_numpy(), n, repeat)
+    _bench("Pearson(233) serisi", lambda: close.rolling(233).apply(lambda y: np.corrcoef(np.arange(233), y)[0, 1], raw=True),
+           lambda: calculate_pearson(close, 233), n, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ortak indikatör kütüphanesi")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_b = sub.add_parser("bench", help="Eski ve vektörel hesapları karşılaştır")
+    p_b.add_argument("--bars", type=int, default=2500)
+    args = parser.parse_args()
+    if args.cmd == "bench": benchmark(args.bars)
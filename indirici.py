@@ -0,0 +1,282 @@
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- AYARLAR ---
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 5.0      # saniyede istek (tüm iş parçacıkları toplamı)
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.5   # sn; her denemede 2 katına çıkar
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def yahoo_symbol(sembol):
+    """BIST sembolünü Yahoo sembolüne çevirir (ALTIN -> GC=F, diğerleri .IS)."""
+    if sembol in ("ALTIN.IN", "ALTIN"): return "GC=F"
+    return f"{sembol}.IS"
+
+
+class DownloadError(Exception):
+    pass
+
+
+class TokenBucket:
+    """Basit token kovası: saniyede `rate` istek, en fazla `burst` birikmiş hak."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def error_text(resp):
+    try: return resp.json()["chart"]["error"]["description"]
+    except Exception: return resp.reason
+
+
+def parse_chart(payload):
+    """Yahoo chart JSON'unu yfinance history(auto_adjust=True) ile aynı biçimde DataFrame'e çevirir."""
+    chart = payload.get("chart", {})
+    if chart.get("error"):
+        raise DownloadError(chart["error"].get("description") or chart["error"].get("code"))
+    result = (chart.get("result") or [None])[0]
+    if not result or not result.get("timestamp"):
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+    tz = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+    quote = result["indicators"]["quote"][0]
+    df = pd.DataFrame({
+        "Open": quote.get("open"), "High": quote.get("high"), "Low": quote.get("low"),
+        "Close": quote.get("close"), "Volume": quote.get("volume"),
+    }, dtype=float)
+    # Günlük barlar borsa saatinde gece yarısına çekilir (yfinance ile aynı tarih anahtarı)
+    df.index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(tz).normalize()
+    df.index.name = "Date"
+
+    adj = result["indicators"].get("adjclose")
+    if adj and adj[0].get("adjclose") is not None:
+        ratio = np.asarray(adj[0]["adjclose"], dtype=float) / df["Close"].to_numpy()
+        for c in ("Open", "High", "Low"): df[c] = df[c] * ratio
+        df["Close"] = np.asarray(adj[0]["adjclose"], dtype=float)
+    df = df.dropna(subset=["Open", "High", "Low", "Close"], how="all")
+    return df[~df.index.duplicated(keep="last")]
+
+
+class Downloader:
+    """Paylaşılan HTTP oturumu + hız sınırı + yeniden deneme ile paralel Yahoo indirici."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, burst=None, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, timeout=15, base_url=YAHOO_CHART_URL):
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate, burst)
+        # Tek oturum, iş parçacığı sayısı kadar kalıcı bağlantı (keep-alive)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+    def fetch(self, yf_symbol, start=None, period="10y", interval="1d"):
+        """Tek sembol: start verilirse o tarihten bugüne, yoksa `period` kadar geçmiş."""
+        params = {"interval": interval, "events": "div,splits", "includeAdjustedClose": "true"}
+        if start is not None:
+            params["period1"] = int(pd.Timestamp(start).timestamp())
+            params["period2"] = int(time.time()) + 86400
+        else:
+            params["range"] = period
+        url = self.base_url.format(symbol=yf_symbol)
+
+        last_err = None
+        for attempt in range(self.retries + 1):
+            if attempt: time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+            self.bucket.acquire()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_err = f"{type(e).__name__}: {e}"
+                continue
+            if resp.status_code in RETRY_STATUS:
+                last_err = f"HTTP {resp.status_code}"
+                continue
+            if resp.status_code != 200:
+                # 404 vb. kalıcı hata: tekrar denemenin anlamı yok
+                raise DownloadError(f"HTTP {resp.status_code}: {error_text(resp)}")
+            return parse_chart(resp.json())
+        raise DownloadError(f"{self.retries + 1} deneme başarısız ({last_err})")
+
+    def download_many(self, jobs, period="10y", verbose=True):
+        """jobs: [(anahtar, yahoo_sembol, start_veya_None), ...].
+
+        (sonuçlar, hatalar) döner: {anahtar: DataFrame}, {anahtar: hata_mesajı}.
+        """
+        results, failures = {}, {}
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.fetch, yf_sym, start, period): key for key, yf_sym, start in jobs}
+            for i, fut in enumerate(as_completed(futures), 1):
+                key = futures[fut]
+                try:
+                    results[key] = fut.result()
+                except Exception as e:
+                    failures[key] = str(e)
+                if verbose and i % 25 == 0: print(f"⬇️ {i}/{len(jobs)} sembol indirildi...")
+        elapsed = time.perf_counter() - t0
+        if verbose: report(len(jobs), failures, elapsed)
+        return results, failures
+
+
+def report(total, failures, elapsed):
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"⚡ {total} sembol {elapsed:.1f} sn'de işlendi ({rate:.1f} sembol/sn). Başarılı: {total - len(failures)}, Hatalı: {len(failures)}")
+    for key, err in sorted(failures.items()):
+        print(f"   ❌ {key}: {err}")
+
+
+# ==================== ÇEVRİMDIŞI TEST SUNUCUSU ====================
+def canned_chart(yf_symbol, n=2520, seed=None):
+    """Yahoo chart yanıtı biçiminde yapay fiyat serisi."""
+    rng = np.random.default_rng(seed if seed is not None else abs(hash(yf_symbol)) % (2 ** 32))
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n, tz="Europe/Istanbul") + pd.Timedelta(hours=10)
+    close = 10 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+    opn = close * np.exp(rng.normal(0, 0.005, n))
+    return {"chart": {"error": None, "result": [{
+        "meta": {"symbol": yf_symbol, "exchangeTimezoneName": "Europe/Istanbul"},
+        "timestamp": dates.as_unit("s").asi8.tolist(),
+        "indicators": {
+            "quote": [{"open": opn.tolist(), "high": (np.maximum(opn, close) * 1.01).tolist(),
+                       "low": (np.minimum(opn, close) * 0.99).tolist(), "close": close.tolist(),
+                       "volume": rng.integers(1e5, 1e7, n).tolist()}],
+            "adjclose": [{"adjclose": close.tolist()}],
+        },
+    }]}}
+
+
+class StandInChartServer:
+    """Yerel Yahoo chart taklidi: hazır yanıt döner, gecikme ve geçici hata (429/500) enjekte eder.
+
+    missing: 404 dönecek semboller. flaky: her sembolün ilk kaç isteği 429 alsın.
+    """
+
+    def __init__(self, latency=0.05, flaky=1, missing=(), bars=2520):
+        self.latency, self.flaky, self.missing, self.bars = latency, flaky, set(missing), bars
+        self.hits = {}
+        self.lock = threading.Lock()
+        # Tüm semboller aynı hazır yanıtı alır; bir kez üretilip kodlanır
+        self.body = canned_chart("CANNED.IS", bars, seed=42)
+        self.encoded = json.dumps(self.body).encode()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args): pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                symbol = url.path.rstrip("/").split("/")[-1]
+                query = parse_qs(url.query)
+                status, data = server.respond(symbol, query)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/v8/finance/chart/{{symbol}}"
+
+    def respond(self, symbol, query):
+        time.sleep(self.latency)
+        with self.lock:
+            self.hits[symbol] = self.hits.get(symbol, 0) + 1
+            hit = self.hits[symbol]
+        if symbol in self.missing:
+            return 404, json.dumps({"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}}).encode()
+        if hit <= self.flaky:
+            return 429, b'{"error": "Too Many Requests"}'
+        if "period1" in query:
+            # Artımlı istek: sadece period1 sonrasındaki barlar
+            res = self.body["chart"]["result"][0]
+            k = int(np.searchsorted(res["timestamp"], int(query["period1"][0])))
+            ind = res["indicators"]
+            body = {"chart": {"error": None, "result": [{
+                "meta": res["meta"], "timestamp": res["timestamp"][k:],
+                "indicators": {"quote": [{c: v[k:] for c, v in ind["quote"][0].items()}],
+                               "adjclose": [{"adjclose": ind["adjclose"][0]["adjclose"][k:]}]},
+            }]}}
+            return 200, json.dumps(body).encode()
+        return 200, self.encoded
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def offline_demo(n_symbols=230, workers=DEFAULT_WORKERS, rate=50.0, latency=0.05):
+    """İndiriciyi ağ olmadan yerel taklit sunucuya karşı çalıştırır."""
+    symbols = [f"S{i:03d}.IS" for i in range(n_symbols)]
+    missing = symbols[::57]
+    with StandInChartServer(latency=latency, flaky=1, missing=missing) as server:
+        dl = Downloader(workers=workers, rate=rate, burst=workers, backoff=0.05, base_url=server.base_url)
+        print(f"Çevrimdışı test: {n_symbols} sembol, {workers} iş parçacığı, {rate:.0f} istek/sn, {latency * 1000:.0f} ms gecikme")
+        results, failures = dl.download_many([(s, s, None) for s in symbols])
+        assert set(failures) == set(missing), "Beklenmeyen hata listesi"
+        assert all(len(df) == server.bars for df in results.values()), "Eksik bar"
+        start = datetime.now().date() - pd.Timedelta(days=10)
+        inc, _ = dl.download_many([(s, s, start) for s in symbols[1:11]], verbose=False)
+        assert all(len(df) <= 10 for df in inc.values()), "Artımlı istek fazla bar döndü"
+    print("✅ Çevrimdışı test tamam.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paralel Yahoo indirici")
+    parser.add_argument("--offline", action="store_true", help="Yerel taklit sunucuya karşı test et")
+    parser.add_argument("--symbols", type=int, default=230)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    if args.offline:
+        offline_demo(args.symbols, args.workers, args.rate, args.latency)
+    else:
+        parser.print_help()
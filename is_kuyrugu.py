@@ -0,0 +1,150 @@
+import re
+import sys
+import time
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- ARKA PLAN İŞ KUYRUĞU ---
+# Panelin taramaları ve veri güncellemesi Streamlit betiğini bloklamasın diye.
+# İşler sınırlı bir iş parçacığı havuzunda çalışır; aynı anahtarla (örn. aynı
+# tarayıcı listesi) bekleyen/çalışan bir iş varsa yenisi açılmaz, mevcut iş
+# döner (iki kullanıcı aynı butona basınca tek tarama). Biten son KEEP iş
+# sonucuyla bellekte kalır; sekmeye dönünce sonuç anında görünür.
+DEFAULT_WORKERS = 2
+DEFAULT_KEEP = 20
+LOG_LINES = 200
+PROGRESS_RE = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+PENDING, RUNNING, DONE, FAILED = "bekliyor", "çalışıyor", "bitti", "hata"
+
+# Süreç içi taramalar sırayla (tarama_servisi.ScanServer._scan_lock gibi):
+# indikatör durumları, önbellekler ve tek çekirdek iki taramayı aynı anda
+# kaldırmaz. Betik işleri (veri indirme) bu kilide girmez, paralel kalır.
+_scan_lock = threading.Lock()
+
+
+class Job:
+    """Tek iş: durum, ilerleme (i, n), kısmi sonuçlar, çıktı satırları ve sonuç."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, key, title):
+        self.id = next(Job._ids)
+        self.key, self.title = key, title
+        self.status = PENDING
+        self.done, self.total = 0, 0
+        self.partial = {}  # grup -> kısmi sonuç listesi (tarayıcı başına satırlar)
+        self.log = deque(maxlen=LOG_LINES)
+        self.result = self.error = None
+        self.created, self.started, self.finished = time.time(), None, None
+        self._lock = threading.Lock()
+
+    # --- iş fonksiyonunun çağırdıkları (arka plan iş parçacığı) ---
+    def progress(self, i, n):
+        self.done, self.total = i, n
+
+    def add_partial(self, group, row):
+        with self._lock: self.partial.setdefault(group, []).append(row)
+
+    def write(self, line):
+        line = line.rstrip()
+        if not line: return
+        self.log.append(line)
+        m = PROGRESS_RE.search(line)
+        if m and int(m.group(2)) > 0: self.progress(int(m.group(1)), int(m.group(2)))
+
+    # --- panelin okudukları ---
+    @property
+    def active(self):
+        return self.status in (PENDING, RUNNING)
+
+    @property
+    def fraction(self):
+        if self.status == DONE: return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def elapsed(self):
+        if self.started is None: return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def partial_snapshot(self):
+        with self._lock: return {g: list(rows) for g, rows in self.partial.items()}
+
+
+class JobQueue:
+    """Sınırlı havuzlu, tekilleştiren iş kuyruğu. submit(key, title, func, *args):
+    func(job, *args) arka planda çalışır, dönüşü job.result olur."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, keep=DEFAULT_KEEP):
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="is")
+        self._jobs = OrderedDict()  # id -> Job (eskiden yeniye)
+        self._lock = threading.Lock()
+
+    def submit(self, key, title, func, *args):
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active: return job
+            job = Job(key, title)
+            self._jobs[job.id] = job
+            self._trim()
+        self._pool.submit(self._run, job, func, args)
+        return job
+
+    def _run(self, job, func, args):
+        job.status, job.started = RUNNING, time.time()
+        try:
+            job.result = func(job, *args)
+            job.status = DONE
+        except Exception as e:
+            job.error, job.status = f"{type(e).__name__}: {e}", FAILED
+        finally:
+            job.finished = time.time()
+            with self._lock: self._trim()
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if not j.active]
+        for job in finished[:max(0, len(finished) - self.keep)]: del self._jobs[job.id]
+
+    def jobs(self):
+        """Tüm işler, en yeni önce."""
+        with self._lock: return list(reversed(self._jobs.values()))
+
+    def get(self, job_id):
+        with self._lock: return self._jobs.get(job_id)
+
+    def latest(self, key):
+        """Bu anahtarla açılmış en yeni iş (yoksa None)."""
+        return next((j for j in self.jobs() if j.key == key), None)
+
+    def active_count(self):
+        return sum(j.active for j in self.jobs())
+
+
+# ==================== HAZIR İŞLER ====================
+def scan_job(job, keys, data_dir):
+    """tarama_motoru taraması: hisse başına ilerleme, tarayıcı başına kısmi sonuçlar.
+    Sıcak tarama servisi çalışıyorsa tarama orada yapılır (panel süreci boşta kalır)."""
+    import tarama_motoru, tarama_servisi
+    if data_dir == tarama_servisi.DATA_DIR and tarama_servisi.available():
+        job.write("Sıcak tarama servisinde çalışıyor")
+        return tarama_servisi.scan(keys, progress=job.progress, on_result=job.add_partial)
+    if not _scan_lock.acquire(blocking=False):
+        job.write("Başka bir taramanın bitmesi bekleniyor")
+        _scan_lock.acquire()
+    try: return tarama_motoru.run_scans(keys, data_dir, progress=job.progress, verbose=False, on_result=job.add_partial)
+    finally: _scan_lock.release()
+
+
+def script_job(job, script_path, cwd, on_success=None):
+    """Harici betik: çıktı satır satır job.log'a akar ('i/n' geçen satırlar ilerleme olur)."""
+    proc = subprocess.Popen([sys.executable, "-u", script_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, cwd=cwd, encoding='utf-8', errors='ignore')
+    for line in proc.stdout: job.write(line)
+    if proc.wait() != 0: raise RuntimeError(f"çıkış kodu {proc.returncode}")
+    if on_success: on_success()
+    return "\n".join(job.log)
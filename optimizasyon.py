@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import pickle
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from fiyat_deposu import list_symbols
+from yukleyici import load_stock_df
+from backtest_motoru import STRATEGIES, DEFAULT_PARAMS, START, IndicatorBank, strategy_signals, simulate
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- STRATEJİ PARAMETRE OPTİMİZASYONU ---
+# Hisse başına binlerce parametre kombinasyonu, walk-forward (genişleyen
+# pencere) ile: [START, n) aralığı folds+1 parçaya bölünür, k. katmanda
+# eğitim [START, t_k), test [t_k, t_k+1). İndikatörler tüm geçmiş üzerinde bir
+# kez hesaplanır (nedensel oldukları için ileriye bakma yok); test penceresinde
+# pozisyon sıfırdan başlar, pencere sonunda açık pozisyon son fiyattan değerlenir.
+# Her hissenin sonucu RUN_DIR/<ad>/<HISSE>.pkl'e yazılır; kesilen çalışma aynı
+# adla tekrar başlatılınca biten hisseleri atlar.
+RUN_DIR = ".optimizasyon"
+GRIDS = {
+    "FRM": {"hull": list(range(21, 200, 8)), "atr": [7, 10, 14, 21, 28]},
+    "BUM": {"fast": list(range(5, 60, 3)), "slow": list(range(20, 150, 6))},
+    "TREF": {"ema": [3, 5, 8, 13], "buy": list(range(45, 61)), "sell": list(range(25, 46))},
+    "RUA": {"bb": list(range(10, 42, 2)), "dev": [1.5, 1.75, 2, 2.25, 2.5, 2.75, 3]},
+}
+
+
+def _valid(key, p):
+    if key == "BUM": return p["fast"] < p["slow"]
+    if key == "TREF": return p["sell"] < p["buy"]
+    return True
+
+
+def param_grid(key, grid=None):
+    """Izgaradaki tüm geçerli kombinasyonlar (varsayılan parametreler dahil)."""
+    grid = grid or GRIDS[key]
+    names = list(grid)
+    combos = [dict(zip(names, v)) for v in itertools.product(*grid.values())]
+    combos = [p for p in combos if _valid(key, p)]
+    if DEFAULT_PARAMS[key] not in combos: combos.append(dict(DEFAULT_PARAMS[key]))
+    return combos
+
+
+def sample_params(key, n, seed=0, grid=None):
+    """Izgaradan n rastgele kombinasyon (tekrarsız, tohumlu) + varsayılanlar."""
+    combos = param_grid(key, grid)
+    default = combos.index(DEFAULT_PARAMS[key])
+    rest = combos[:default] + combos[default + 1:]
+    picked = random.Random(seed).sample(rest, min(n, len(rest)))
+    return picked + [combos[default]]
+
+
+def walk_forward_splits(n, folds=4, start=START):
+    """[(eğitim_başı, eğitim_sonu, test_sonu), ...]; eğitim hep start'tan başlar."""
+    edges = np.linspace(start, n, folds + 2).astype(int)
+    return [(start, int(edges[k + 1]), int(edges[k + 2])) for k in range(folds)]
+
+
+def _window(c, entry, exit, a, b):
+    opens, closes, pnl, equity = simulate(c, entry, exit, a, b)
+    value = equity[-1]
+    if len(opens) > len(closes): value *= c[b - 1] / c[opens[-1]]
+    return value - 100, len(opens)
+
+
+def evaluate_symbol(df, key, combos, splits):
+    """Bir hisse için tüm kombinasyonlar x katmanlar: eğitim/test getirisi ve işlem sayısı."""
+    bank = IndicatorBank(df, memo=False)
+    shape = (len(combos), len(splits))
+    out = {name: np.zeros(shape) for name in ("train", "test", "train_trades", "test_trades")}
+    for i, p in enumerate(combos):
+        entry, exit, _ = strategy_signals(bank, key, p)
+        for j, (a, t, b) in enumerate(splits):
+            out["train"][i, j], out["train_trades"][i, j] = _window(bank.c, entry, exit, a, t)
+            out["test"][i, j], out["test_trades"][i, j] = _window(bank.c, entry, exit, t, b)
+    return out
+
+
+def _run_symbol(args):
+    hisse, data_dir, key, combos, folds = args
+    df = load_stock_df(hisse, data_dir)
+    if df is None or len(df) < START + (folds + 1) * 20: return hisse, None
+    splits = walk_forward_splits(len(df), folds)
+    result = evaluate_symbol(df, key, combos, splits)
+    result["splits"] = splits
+    return hisse, result
+
+
+def _save(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh: pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def run_dir(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, RUN_DIR, name)
+
+
+def optimize(key, name=None, search="grid", n=500, seed=0, folds=4, workers=None, symbols=None,
+             data_dir=DATA_DIR, restart=False, progress=None):
+    """Parametre taramasını çalıştırır (veya kaldığı yerden sürdürür); çalışma klasörünü döner."""
+    if key not in STRATEGIES: raise ValueError(f"Bilinmeyen strateji: {key}")
+    combos = param_grid(key) if search == "grid" else sample_params(key, n, seed)
+    name = name or f"{key}_{search}_{folds}"
+    out_dir = run_dir(name, data_dir)
+    config = {"strategy": key, "search": search, "n": n, "seed": seed, "folds": folds, "combos": combos}
+    manifest = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest) and not restart:
+        with open(manifest, encoding="utf-8") as fh: old = json.load(fh)
+        if old != config:
+            raise ValueError(f"'{name}' farklı ayarlarla başlatılmış; yeni ad verin veya restart=True (--yeni)")
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        for f in os.listdir(out_dir): os.remove(os.path.join(out_dir, f))
+        with open(manifest, "w", encoding="utf-8") as fh: json.dump(config, fh, ensure_ascii=False)
+
+    symbols = symbols or list_symbols(data_dir)
+    todo = [s for s in symbols if not os.path.exists(os.path.join(out_dir, f"{s}.pkl"))]
+    tasks = [(s, data_dir, key, combos, folds) for s in todo]
+    workers = workers or os.cpu_count() or 1
+
+    def done(i, hisse, result):
+        _save(os.path.join(out_dir, f"{hisse}.pkl"), result)
+        if progress: progress(len(symbols) - len(todo) + i, len(symbols))
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_symbol, t) for t in tasks]
+            for i, fut in enumerate(as_completed(futures), 1): done(i, *fut.result())
+    else:
+        for i, t in enumerate(tasks, 1): done(i, *_run_symbol(t))
+    return out_dir
+
+
+def load_results(out_dir):
+    """(manifest, {hisse: sonuç}) ; veri yetmeyen hisseler atlanır."""
+    with open(os.path.join(out_dir, "manifest.json"), encoding="utf-8") as fh: config = json.load(fh)
+    results = {}
+    for f in sorted(os.listdir(out_dir)):
+        if not f.endswith(".pkl"): continue
+        with open(os.path.join(out_dir, f), "rb") as fh: r = pickle.load(fh)
+        if r is not None: results[f[:-4]] = r
+    return config, results
+
+
+def summarize(out_dir):
+    """Walk-forward özeti. Her hisse ve katmanda eğitimde en iyi kombinasyon seçilir,
+    testteki (örneklem dışı) getirisi varsayılan parametrelerle karşılaştırılır.
+    (hisse x katman tablosu, parametre sıralaması) döner."""
+    config, results = load_results(out_dir)
+    combos = config["combos"]
+    default = combos.index(DEFAULT_PARAMS[config["strategy"]])
+    rows = []
+    for hisse, r in results.items():
+        for j, (a, t, b) in enumerate(r["splits"]):
+            best = int(np.argmax(r["train"][:, j]))
+            rows.append({"Hisse": hisse, "Katman": j + 1, "Test Barları": f"{t}-{b}",
+                         "Parametre": json.dumps(combos[best]), "Eğitim %": r["train"][best, j],
+                         "Test %": r["test"][best, j], "Varsayılan Test %": r["test"][default, j],
+                         "Test İşlem": int(r["test_trades"][best, j])})
+    folds = pd.DataFrame(rows)
+    # Tüm hisse ve katmanlarda ortalama test getirisine göre parametre sıralaması
+    if results:
+        test = np.stack([r["test"] for r in results.values()])
+        train = np.stack([r["train"] for r in results.values()])
+        ranking = pd.DataFrame({"Parametre": [json.dumps(p) for p in combos],
+                                "Ort. Eğitim %": train.mean(axis=(0, 2)), "Ort. Test %": test.mean(axis=(0, 2)),
+                                "Test Medyan %": np.median(test, axis=(0, 2))})
+        ranking = ranking.sort_values("Ort. Test %", ascending=False, ignore_index=True)
+    else: ranking = pd.DataFrame()
+    return folds, ranking
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strateji parametre optimizasyonu (walk-forward)")
+    parser.add_argument("strateji", choices=list(STRATEGIES))
+    parser.add_argument("--arama", choices=["grid", "random"], default="grid", help="Izgara veya rastgele arama")
+    parser.add_argument("--n", type=int, default=500, help="Rastgele aramada kombinasyon sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--folds", type=int, default=4, help="Walk-forward katman sayısı")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument("--hisse", nargs="*", help="Yalnızca bu hisseler")
+    parser.add_argument("--ad", default=None, help="Çalışma adı (sürdürmek için aynı ad)")
+    parser.add_argument("--yeni", action="store_true", help="Aynı adlı çalışmayı silip baştan başlat")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    out = optimize(args.strateji, args.ad, args.arama, args.n, args.seed, args.folds, args.workers,
+                   [h.upper() for h in args.hisse] if args.hisse else None, restart=args.yeni,
+                   progress=lambda i, n: print(f"\r{i}/{n} hisse", end="", flush=True))
+    config, _ = load_results(out)
+    folds, ranking = summarize(out)
+    print(f"\n{len(config['combos'])} kombinasyon, {folds['Hisse'].nunique() if len(folds) else 0} hisse, "
+          f"{args.folds} katman: {time.perf_counter() - t0:.1f} sn  ({out})")
+    if len(folds):
+        print(f"Walk-forward seçilen parametre, ort. test getirisi: %{folds['Test %'].mean():.1f}  "
+              f"(eğitim %{folds['Eğitim %'].mean():.1f}, varsayılan test %{folds['Varsayılan Test %'].mean():.1f})")
+        print(ranking.head(10).to_string(index=False, float_format="%.1f"))
@@ -1,7 +1,8 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import time
+import indirici
+import indikatorler
 
 print("--- SKYLAR AI: BIST & ENDEKS GENİŞ TARAMA MODU ---")
 
@@ -46,19 +47,9 @@ for s in raw_symbols:
 def calculate_ema(data, period):
     return data.ewm(span=period, adjust=False).mean()
 
-def calculate_linreg_value(series, length=144):
-    y = series.values if isinstance(series, pd.Series) else series
-    y = np.array(y).flatten()
-    if len(y) < 2: return np.nan
-    x = np.arange(len(y))
-    slope, intercept = np.polyfit(x, y, 1)
-    return slope * (len(y) - 1) + intercept
-
 def calculate_zlsma(data, length=173):
-    lsma = data.rolling(window=length).apply(lambda x: calculate_linreg_value(x), raw=True)
-    lsma2 = lsma.rolling(window=length).apply(lambda x: calculate_linreg_value(x), raw=True)
-    eq = lsma - lsma2
-    return lsma + eq
+    # LSMA + (LSMA - LSMA(LSMA)); kayan regresyon indikatorler'de O(n)
+    return indikatorler.calculate_zlsma(data, length)
 
 def calculate_hma(data, period=196):
     half_length = int(period / 2)
@@ -74,14 +65,15 @@ def calculate_tema(data, period=144):
     ema3 = calculate_ema(ema2, period)
     return 3 * ema1 - 3 * ema2 + ema3
 
-def analyze_symbol(symbol):
+def warmup(tol):
+    """Kuyruk modunda gereken bar: HMA/ZLSMA pencereleri, TEMA 144 ve EMA 233."""
+    return max(196 + int(np.sqrt(196)), 173, 200,
+               indikatorler.ema_warmup(144, stages=3, tol=tol), indikatorler.ema_warmup(233, tol=tol),
+               indikatorler.ema_warmup(26, tol=tol) + indikatorler.ema_warmup(9, tol=tol))
+
+def analyze_symbol(symbol, df):
     try:
-        # Veri Çekme (Hataları gizle, sadece sonucu ver)
-        df = yf.download(symbol, period="2y", progress=False)
-        if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
-        df = df.loc[:, ~df.columns.duplicated()]
-        
-        if len(df) < 200:
+        if df is None or len(df) < 200:
             return None
 
         # --- İNDİKATÖRLER ---
@@ -164,7 +156,9 @@ def analyze_symbol(symbol):
 # ==========================================
 
 print(f"Toplam {len(formatted_symbols)} adet enstrüman taranıyor... Lütfen bekleyin.")
-print("Bu işlem 2-3 dakika sürebilir.\n")
+
+# Önce tüm veriyi paralel (hız sınırlı) indir, sonra hesapla
+data, failures = indirici.Downloader().download_many([(s, s, None) for s in formatted_symbols], period="2y")
 
 results = []
 counter = 0
@@ -174,7 +168,10 @@ for sym in formatted_symbols:
     # İlerleme çubuğu (Basit)
     print(f"\rİşleniyor: {counter}/{len(formatted_symbols)} - {sym:<10}", end="")
     
-    res = analyze_symbol(sym)
+    df = data.get(sym)
+    # INDIKATOR_KUYRUK_TOL verilmişse yalnızca gereken son barlar
+    if df is not None and indikatorler.TAIL_TOL: df = indikatorler.tail_bars(df, warmup(indikatorler.TAIL_TOL))
+    res = analyze_symbol(sym, df)
     if res: results.append(res)
 
 print("\n\n" + "="*85)
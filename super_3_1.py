@@ -1,10 +1,11 @@
 import os
 import pandas as pd
 import numpy as np
-import glob
-import math
 from datetime import datetime
-from tqdm import tqdm  # <--- EKSİK OLAN BU SATIR EKLENDİ
+from fiyat_deposu import list_symbols
+from yukleyici import load_stock_df
+import tarama_sonucu
+from indikatorler import calculate_hma, calculate_qnr, qnr_point
 
 # --- BULUT UYUMLU KLASÖR AYARLARI ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -15,37 +16,10 @@ if not os.path.exists(VERI_KLASORU):
     os.makedirs(VERI_KLASORU)
 
 # --- YARDIMCI FONKSİYONLAR ---
-def load_stock_df(file_path):
-    try:
-        df = pd.read_excel(file_path)
-        df.columns = [str(c).strip().upper() for c in df.columns]
-        col_map = {"DATE": ["DATE"], "CLOSING_TL": ["CLOSING_TL","CLOSE"], "HIGH_TL": ["HIGH_TL","HIGH"], "LOW_TL": ["LOW_TL","LOW"], "VOLUME_TL": ["VOLUME_TL","VOL"]}
-        for t, aliases in col_map.items():
-            if t not in df.columns:
-                for a in aliases:
-                    if a in df.columns: df.rename(columns={a: t}, inplace=True); break
-        
-        # High/Low yoksa Close kopyala (Hata önlemek için)
-        if "CLOSING_TL" in df.columns:
-            if "HIGH_TL" not in df.columns: df["HIGH_TL"] = df["CLOSING_TL"]
-            if "LOW_TL" not in df.columns: df["LOW_TL"] = df["CLOSING_TL"]
-            
-        return df
-    except: return None
-
-def calculate_wma(series, period):
-    weights = np.arange(1, period + 1)
-    return series.rolling(period).apply(lambda x: np.dot(x, weights) / weights.sum(), raw=True)
-
-# QnR Kernel Hesabı (Orijinal Mantık)
+# QnR Kernel Hesabı (Orijinal Mantık) - ağırlıklar indikatorler'de bir kez hesaplanır
 def get_kernel_point(prices, idx, h, r, x0):
     if idx < x0: return 0.0
-    prices_slice = prices.iloc[idx-x0:idx+1].values
-    weights = np.array([math.pow(1 + (math.pow(i, 2) / ((math.pow(h, 2) * 2 * r))), -r) for i in range(x0 + 1)])[::-1]
-    
-    current_weight = np.sum(prices_slice * weights)
-    cumulative_weight = np.sum(weights)
-    return current_weight / cumulative_weight if cumulative_weight != 0 else 0
+    return qnr_point(prices, idx, h, r, x0)
 
 # 1. MATLRNS
 def calc_matlrns(df):
@@ -89,51 +63,74 @@ def calc_trendliner(df):
         return 0, "NÖTR"
     except: return 0, "-"
 
+# TrendLiner'ın bar bar hali (geriye dönük test için): 2 AL, -2 SAT, 0 NÖTR
+def trendliner_signals(df):
+    close = df['CLOSING_TL']
+    atr = (df['HIGH_TL'] - df['LOW_TL']).ewm(alpha=1/2).mean()
+    h1 = (df['HIGH_TL'] - (1.7 * atr)).rolling(68).max()
+    trend_up = close > h1
+    qnr = calculate_qnr(close, 23, 23, 23)
+    qnr_up = qnr > qnr.shift(1)
+    return pd.Series(np.where(trend_up, 2, np.where(~qnr_up, -2, 0)), index=df.index)
+
 # 3. TREND ORTA VADE (Hull)
 def calc_hull(df):
     try:
         close = df['CLOSING_TL']
-        w1 = calculate_wma(close, 72)
-        w2 = calculate_wma(close, 144)
-        hma = calculate_wma(2*w1 - w2, 12)
+        hma = calculate_hma(close, 144) # WMA 72 / 144 / 12
         
         if hma.iloc[-1] > hma.iloc[-2]: return 1, "✅ Yükseliş"
         else: return -1, "🔻 Düşüş"
     except: return 0, "-"
 
+# Tarama motoru (tarama_motoru.py) için arayüz
+LOAD_ARGS = {"min_bars": 150, "fill_from_close": ("HIGH_TL", "LOW_TL")}
+
+def analyze(hisse, df):
+    """Toplam skoru pozitif olan hisse için rapor satırı, yoksa None"""
+    s1, d1 = calc_matlrns(df)
+    s2, d2 = calc_trendliner(df)
+    s3, d3 = calc_hull(df)
+    
+    total = s1 + s2 + s3
+    
+    yorum = "NÖTR"
+    if total >= 4: yorum = "🔥 SÜPER FIRSAT"
+    elif total >= 2: yorum = "✅ GÜÇLÜ AL"
+    
+    if total > 0:
+        return {
+            'Hisse': hisse, 'SKOR': total, 'Yorum': yorum,
+            'MATLRNS': d1, 'TrendLiner': d2, 'Hull_Orta': d3, 'Fiyat': df['CLOSING_TL'].iloc[-1]
+        }
+    return None
+
+# Tarama geçmişine (tarama_gecmisi) yazılan sayfa ve sütunlar
+HISTORY = {"sheet": "Sheet1", "symbol": "Hisse", "signal": "Yorum", "score": "SKOR"}
+
+def report_path(when):
+    return os.path.join(KAYIT_KLASORU, f"Super_3_1_{when.strftime('%Y%m%d')}.xlsx")
+
+def tables(results):
+    if not results: return {}
+    return {'Sheet1': pd.DataFrame(results).sort_values(by='SKOR', ascending=False)}
+
+def write_report(results):
+    return tarama_sonucu.export_excel(tables(results), report_path(datetime.now()))
+
 def main():
+    from tqdm import tqdm
     print("3+1 Süper Tarama (Orijinal) Başlıyor...")
     results = []
-    files = glob.glob(os.path.join(VERI_KLASORU, "*.xlsx"))
+    symbols = list_symbols(VERI_KLASORU)
     
-    # tqdm burada kullanılıyor, import edildiği için artık hata vermez
-    for f in tqdm(files):
-        df = load_stock_df(f)
-        if df is None or len(df) < 150: continue
-        
-        hisse = os.path.basename(f).replace('.xlsx','')
-        
-        s1, d1 = calc_matlrns(df)
-        s2, d2 = calc_trendliner(df)
-        s3, d3 = calc_hull(df)
-        
-        total = s1 + s2 + s3
-        
-        yorum = "NÖTR"
-        if total >= 4: yorum = "🔥 SÜPER FIRSAT"
-        elif total >= 2: yorum = "✅ GÜÇLÜ AL"
-        
-        if total > 0:
-            results.append({
-                'Hisse': hisse, 'SKOR': total, 'Yorum': yorum,
-                'MATLRNS': d1, 'TrendLiner': d2, 'Hull_Orta': d3, 'Fiyat': df['CLOSING_TL'].iloc[-1]
-            })
+    for hisse in tqdm(symbols):
+        df = load_stock_df(hisse, VERI_KLASORU, **LOAD_ARGS)
+        if df is None: continue
+        r = analyze(hisse, df)
+        if r is not None: results.append(r)
             
-    if results:
-        df_res = pd.DataFrame(results).sort_values(by='SKOR', ascending=False)
-        out = os.path.join(KAYIT_KLASORU, f"Super_3_1_{datetime.now().strftime('%Y%m%d')}.xlsx")
-        df_res.to_excel(out, index=False)
-        print(f"✅ Kaydedildi: {out}")
+    write_report(results)
 
 if __name__ == "__main__":
     main()
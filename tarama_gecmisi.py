@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- TARAMA GEÇMİŞİ (SQLite) ---
+# Her taramanın ana tablosu (tarayıcının HISTORY tanımı: sayfa, hisse, sinyal,
+# skor sütunları) (tarih, tarayıcı, hisse) anahtarıyla tek dosyalık SQLite'a
+# yazılır; satırın tamamı JSON olarak da saklanır. Aynı gün tekrar taranırsa o
+# günün kaydı son taramayla değişir. Günden güne fark, "N gündür IDEAL UP"
+# serileri ve hisse geçmişi indeksli tek sorgudur; Excel okunmaz.
+DB_FILE = ".tarama_gecmisi.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    scan_date TEXT NOT NULL, scanner TEXT NOT NULL, created TEXT NOT NULL, rows INTEGER NOT NULL,
+    PRIMARY KEY (scan_date, scanner)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS results (
+    scan_date TEXT NOT NULL, scanner TEXT NOT NULL, symbol TEXT NOT NULL,
+    signal TEXT, score REAL, data TEXT,
+    PRIMARY KEY (scan_date, scanner, symbol)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_results_symbol ON results (symbol, scan_date);
+CREATE INDEX IF NOT EXISTS ix_results_signal ON results (scanner, signal, scan_date);
+"""
+_NUMBER = re.compile(r"\s*(-?\d+(?:[.,]\d+)?)")
+
+
+def db_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, DB_FILE)
+
+
+def stamp(data_dir=DATA_DIR):
+    """Veritabanının değişim damgası (WAL dosyası dahil); önbellek anahtarı için."""
+    out = []
+    for suffix in ("", "-wal"):
+        try: out.append(os.stat(db_path(data_dir) + suffix).st_mtime_ns)
+        except OSError: out.append(0)
+    return tuple(out)
+
+
+def _connect(data_dir=DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path(data_dir), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _query(sql, params=(), data_dir=DATA_DIR):
+    if not os.path.exists(db_path(data_dir)): return None
+    with closing(_connect(data_dir)) as conn: return pd.read_sql_query(sql, conn, params=params)
+
+
+def _score(v):
+    """Sayı ya da sayıyla başlayan metin ('14/14', '3/3') -> float; değilse None."""
+    if isinstance(v, (bool, np.bool_)) or v is None: return None
+    if isinstance(v, (int, float, np.number)): return None if pd.isna(v) else float(v)
+    m = _NUMBER.match(str(v))
+    return float(m.group(1).replace(",", ".")) if m else None
+
+
+def _signal(v):
+    return None if v is None or pd.isna(v) or str(v).strip() == "" else str(v)
+
+
+def _column(df, spec):
+    if spec is None: return pd.Series([None] * len(df), index=df.index, dtype=object)
+    return spec(df) if callable(spec) else df[spec]
+
+
+def _json_default(v):
+    return v.item() if isinstance(v, np.generic) else str(v)
+
+
+def history_rows(res, spec):
+    """ScanResult + HISTORY tanımı -> (hisse, sinyal, skor, json) satırları."""
+    df = res.sheets.get(spec["sheet"])
+    if df is None or df.empty: return []
+    if spec.get("filter"): df = spec["filter"](df)
+    symbols, signals, scores = _column(df, spec["symbol"]), _column(df, spec.get("signal")), _column(df, spec.get("score"))
+    records = df.to_dict("records")
+    return [(str(sym), _signal(sig), _score(sc),
+             json.dumps(rec, ensure_ascii=False, default=_json_default))
+            for sym, sig, sc, rec in zip(symbols, signals, scores, records) if isinstance(sym, str) and sym]
+
+
+def record(res, spec, data_dir=DATA_DIR):
+    """Taramayı geçmişe yazar (aynı gün aynı tarayıcının önceki kaydı değişir); satır sayısını döner."""
+    rows = history_rows(res, spec)
+    day = res.created.strftime("%Y-%m-%d")
+    with closing(_connect(data_dir)) as conn, conn:
+        conn.execute("DELETE FROM results WHERE scan_date = ? AND scanner = ?", (day, res.key))
+        conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                         [(day, res.key) + r for r in rows])
+        conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                     (day, res.key, res.created.isoformat(timespec="seconds"), len(rows)))
+    return len(rows)
+
+
+# ==================== SORGULAR ====================
+def runs(scanner=None, data_dir=DATA_DIR):
+    """Kayıtlı tarama günleri (en yeni önce)."""
+    where, params = ("WHERE scanner = ?", (scanner,)) if scanner else ("", ())
+    return _query(f"SELECT scan_date, scanner, created, rows FROM runs {where} ORDER BY scan_date DESC, scanner",
+                  params, data_dir)
+
+
+def scan_dates(scanner, data_dir=DATA_DIR):
+    df = runs(scanner, data_dir)
+    return [] if df is None else df["scan_date"].tolist()
+
+
+def signals(scanner, data_dir=DATA_DIR):
+    """Tarayıcının geçmişte verdiği sinyaller ve kaç kez verildiği."""
+    return _query("SELECT signal, COUNT(*) AS adet FROM results WHERE scanner = ? AND signal IS NOT NULL "
+                  "GROUP BY signal ORDER BY adet DESC", (scanner,), data_dir)
+
+
+def symbols(scanner, signal=None, date=None, before=None, data_dir=DATA_DIR):
+    """Bir gündeki hisseler; tarih verilmezse son kayıtlı gün (before verilirse ondan önceki
+    son gün). Uygun kayıt yoksa None."""
+    dates = [d for d in scan_dates(scanner, data_dir) if before is None or d < before]
+    day = date or (dates[0] if dates else None)
+    if day is None: return None
+    sql = "SELECT symbol FROM results WHERE scanner = ? AND scan_date = ?" + (" AND signal = ?" if signal else "")
+    df = _query(sql, (scanner, day) + ((signal,) if signal else ()), data_dir)
+    return set(df["symbol"])
+
+
+def diff(scanner, signal=None, date=None, prev=None, data_dir=DATA_DIR):
+    """İki tarama günü arasında listeye (veya sinyale) YENİ GİREN / ÇIKAN hisseler.
+    Varsayılan: son gün ile bir önceki kayıtlı gün."""
+    dates = scan_dates(scanner, data_dir)
+    date = date or (dates[0] if dates else None)
+    older = [d for d in dates if date and d < date]
+    prev = prev or (older[0] if older else None)
+    if date is None or prev is None: return pd.DataFrame(columns=["Durum", "Hisse", "Sinyal", "Skor"])
+    cond = " AND signal = ?" if signal else ""
+    sql = f"""
+    WITH a AS (SELECT symbol, signal, score FROM results WHERE scanner = ? AND scan_date = ?{cond}),
+         b AS (SELECT symbol, signal, score FROM results WHERE scanner = ? AND scan_date = ?{cond})
+    SELECT 'YENİ GİREN' AS Durum, symbol AS Hisse, signal AS Sinyal, score AS Skor FROM a
+        WHERE symbol NOT IN (SELECT symbol FROM b)
+    UNION ALL
+    SELECT 'ÇIKAN', symbol, signal, score FROM b WHERE symbol NOT IN (SELECT symbol FROM a)
+    ORDER BY Durum DESC, Hisse"""
+    sig = (signal,) if signal else ()
+    out = _query(sql, (scanner, date) + sig + (scanner, prev) + sig, data_dir)
+    out.attrs.update(date=date, prev=prev)
+    return out
+
+
+def streaks(scanner, signal=None, min_days=1, data_dir=DATA_DIR):
+    """Son tarama gününden geriye kesintisiz kaç tarama günüdür listede (veya sinyalde) olunduğu.
+    Günler tarayıcının kayıtlı tarama günleridir (hafta sonu vb. boşluklar seriyi bozmaz)."""
+    cond = " AND r.signal = ?" if signal else ""
+    sql = f"""
+    WITH d AS (SELECT scan_date, ROW_NUMBER() OVER (ORDER BY scan_date DESC) AS k FROM runs WHERE scanner = ?),
+         h AS (SELECT r.symbol, d.k, ROW_NUMBER() OVER (PARTITION BY r.symbol ORDER BY d.k) AS j
+               FROM results r JOIN d ON d.scan_date = r.scan_date WHERE r.scanner = ?{cond})
+    SELECT symbol AS Hisse, COUNT(*) AS Seri FROM h WHERE k = j GROUP BY symbol HAVING COUNT(*) >= ?
+    ORDER BY Seri DESC, Hisse"""
+    return _query(sql, (scanner, scanner) + ((signal,) if signal else ()) + (min_days,), data_dir)
+
+
+def symbol_history(symbol, scanner=None, data_dir=DATA_DIR):
+    """Bir hissenin tüm tarayıcılardaki geçmişi (en yeni önce)."""
+    cond = " AND scanner = ?" if scanner else ""
+    return _query(f"SELECT scan_date AS Tarih, scanner AS Tarayıcı, signal AS Sinyal, score AS Skor, data FROM results "
+                  f"WHERE symbol = ?{cond} ORDER BY scan_date DESC, scanner",
+                  (symbol.upper(),) + ((scanner,) if scanner else ()), data_dir)
+
+
+def backfill(data_dir=DATA_DIR):
+    """Kayıtlı tarama sonuçlarından (tarama_sonucu) geçmişi doldurur; eskiden yeniye."""
+    import tarama_sonucu
+    import tarama_motoru
+    n = 0
+    for m in reversed(tarama_sonucu.history(data_dir=data_dir)):
+        spec = getattr(tarama_motoru.load_scanner(m["scanner"]), "HISTORY", None)
+        if spec: record(tarama_sonucu.ScanResult.load(m["path"]), spec, data_dir); n += 1
+    return n
+
+
+def clear(data_dir=DATA_DIR):
+    for suffix in ("", "-wal", "-shm"):
+        try: os.remove(db_path(data_dir) + suffix)
+        except OSError: pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tarama geçmişi (SQLite)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("runs", help="Kayıtlı tarama günleri")
+    p_diff = sub.add_parser("diff", help="Son iki gün arasında giren/çıkan hisseler")
+    p_diff.add_argument("scanner")
+    p_diff.add_argument("--sinyal", default=None)
+    p_streak = sub.add_parser("seri", help="Kesintisiz seri uzunlukları")
+    p_streak.add_argument("scanner")
+    p_streak.add_argument("--sinyal", default=None)
+    p_streak.add_argument("--min", type=int, default=1)
+    p_sym = sub.add_parser("hisse", help="Hisse geçmişi")
+    p_sym.add_argument("symbol")
+    sub.add_parser("doldur", help="Kayıtlı sonuçlardan geçmişi doldur")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "runs": out = runs()
+    elif args.cmd == "diff": out = diff(args.scanner, args.sinyal)
+    elif args.cmd == "seri": out = streaks(args.scanner, args.sinyal, args.min)
+    elif args.cmd == "hisse":
+        out = symbol_history(args.symbol)
+        if out is not None: out = out.drop(columns="data")
+    else: out = f"{backfill()} sonuç geçmişe yazıldı"
+    elapsed = time.perf_counter() - t0
+    print(out if isinstance(out, str) else ("Geçmiş boş." if out is None else out.to_string(index=False)))
+    print(f"({elapsed * 1000:.1f} ms)")
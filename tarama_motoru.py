@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+import threading
+import numpy as np
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from concurrent.futures import ProcessPoolExecutor
+from fiyat_deposu import list_symbols
+from yukleyici import load_stock_df, cache_summary
+import indikator_onbellek
+import indikator_durumu
+import indikatorler
+import tarama_sonucu
+import tarama_gecmisi
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- TARAYICILAR ---
+# anahtar -> (dosya, panelde görünen ad). Her tarayıcı modülü şunları sunar:
+#   LOAD_ARGS          : load_stock_df'e giden ek argümanlar (min_bars vb.)
+#   analyze(hisse, df) : tek hisse sonucu (None = rapora girmez)
+#   tables(list)       : sonuç listesinden rapor tabloları {sayfa: DataFrame}
+#   report_path(zaman) : Excel raporunun yolu; REPORT_STYLE (isteğe bağlı) renkler, excel_rapor'a bakın
+#   write_report(list) : tek başına çalışırken Excel raporu, yolunu döner
+#   warmup(tol)        : (isteğe bağlı) kuyruk modunda analyze'a yetecek son bar sayısı
+SCANNERS = {
+    "guclu_trend": ("guclu_trend.py", "Güçlü Trend"),
+    "expert_ma": ("expert_ma.py", "Expert MA"),
+    "super_3_1": ("super_3_1.py", "3+1 Süper"),
+    "super_tarama_v2": ("super_tarama_v2.py", "3'lü (Temel Analizli)"),
+    "rua_trend": ("rua_trend.py", "RUA Trend"),
+    "hacimli_ema": ("hacimli_ema.py", "Hacimli EMA"),
+    "linreg_extended": ("linreg_extended.py", "LinReg Full"),
+    "hibo_v4": ("hibo_v4.py", "Hibrit V4"),
+    "kombine_tarama": ("kombine_tarama", "Kombine"),
+}
+
+
+_load_lock = threading.RLock()  # panelde iki iş aynı anda yüklerse yarım modül görülmesin
+
+
+def load_scanner(key):
+    """Tarayıcı modülünü bir kez yükler (uzantısız kombine_tarama dahil)."""
+    with _load_lock:
+        if key in sys.modules: return sys.modules[key]
+        fname = SCANNERS[key][0]
+        if fname.endswith(".py"): return importlib.import_module(key)
+        loader = SourceFileLoader(key, os.path.join(BASE_DIR, fname))
+        mod = module_from_spec(spec_from_loader(key, loader))
+        sys.modules[key] = mod
+        try: loader.exec_module(mod)
+        except BaseException:
+            del sys.modules[key]
+            raise
+        return mod
+
+
+def _tail_tol(tail_tol):
+    # None: ortam ayarı (INDIKATOR_KUYRUK_TOL), 0: tüm geçmiş
+    return indikatorler.TAIL_TOL if tail_tol is None else (tail_tol or None)
+
+
+def tail_lengths(mods, tail_tol=None):
+    """Kuyruk modunda tarayıcı başına kesilecek bar sayısı (warmup yoksa veya mod kapalıysa None)."""
+    tol = _tail_tol(tail_tol)
+    if not tol: return dict.fromkeys(mods)
+    return {k: max(mod.warmup(tol), getattr(mod, "LOAD_ARGS", {}).get("min_bars", 0)) if hasattr(mod, "warmup") else None
+            for k, mod in mods.items()}
+
+
+def scan_symbols(keys, symbols, data_dir=DATA_DIR, progress=None, tail_tol=None, on_result=None):
+    """Her hisseyi bir kez yükleyip seçili tüm tarayıcılardan geçirir.
+
+    ({anahtar: [sonuç, ...]}, {anahtar: harcanan_sn}, hata_sayısı) döner.
+    Sonuçlar hisse sırasını korur; tek tarayıcının çıktısıyla aynıdır.
+    tail_tol verilirse (ya da INDIKATOR_KUYRUK_TOL ayarlıysa) warmup bildiren
+    tarayıcılara yalnızca gereken son barlar gider.
+    on_result(anahtar, sonuç) verilirse her sonuç bulunduğu anda bildirilir.
+    """
+    mods = {k: load_scanner(k) for k in keys}
+    tails = tail_lengths(mods, tail_tol)
+    results = {k: [] for k in keys}
+    timings = dict.fromkeys(keys, 0.0)
+    errors = 0
+    for i, hisse in enumerate(symbols, 1):
+        for k, mod in mods.items():
+            t0 = time.perf_counter()
+            try:
+                df = load_stock_df(hisse, data_dir, **getattr(mod, "LOAD_ARGS", {}))
+                if df is not None and tails[k]: df = indikatorler.tail_bars(df, tails[k])
+                r = mod.analyze(hisse, df) if df is not None else None
+                if r is not None:
+                    results[k].append(r)
+                    if on_result: on_result(k, r)
+            except Exception:
+                errors += 1
+            timings[k] += time.perf_counter() - t0
+        if progress: progress(i, len(symbols))
+    return results, timings, errors
+
+
+def _scan_chunk(args):
+    keys, symbols, data_dir, tail_tol = args
+    return scan_symbols(keys, symbols, data_dir, tail_tol=tail_tol)
+
+
+def run_scans(keys=None, data_dir=DATA_DIR, workers=1, report=True, progress=None, verbose=True, tail_tol=None,
+              on_result=None, excel=False):
+    """Seçili tarayıcıları tek geçişte çalıştırır ve raporlarını yazar.
+
+    keys None ise hepsi. workers > 1 ise hisseler süreçlere bölünür.
+    tail_tol: kuyruk modu toleransı (None ise ortam ayarı, 0 tüm geçmiş).
+    on_result(anahtar, sonuç): kısmi sonuç bildirimi (süreçli modda dilim bitince).
+    {anahtar: tarama_sonucu.ScanResult} döner; sonuçlar kaydedilir ve tarama geçmişine
+    (tarama_gecmisi, tarayıcının HISTORY tanımıyla) işlenir, excel=True ise Excel
+    raporu da hemen yazılır (report=False ise kaydetmeden sonuç listeleri).
+    """
+    keys = list(SCANNERS) if keys is None else list(keys)
+    unknown = [k for k in keys if k not in SCANNERS]
+    if unknown: raise ValueError(f"Bilinmeyen tarayıcı: {', '.join(unknown)}")
+    symbols = list_symbols(data_dir)
+    t0 = time.perf_counter()
+
+    if workers > 1 and len(symbols) > workers:
+        # Sıra korunsun diye ardışık dilimler; birleştirirken aynı sırada eklenir
+        size = -(-len(symbols) // workers)
+        chunks = [(keys, symbols[i:i + size], data_dir, tail_tol) for i in range(0, len(symbols), size)]
+        results = {k: [] for k in keys}
+        timings = dict.fromkeys(keys, 0.0)
+        errors = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for n, (res, tim, err) in enumerate(pool.map(_scan_chunk, chunks), 1):
+                for k in keys:
+                    results[k].extend(res[k]); timings[k] += tim[k]
+                    if on_result:
+                        for r in res[k]: on_result(k, r)
+                errors += err
+                if progress: progress(min(n * size, len(symbols)), len(symbols))
+    else:
+        results, timings, errors = scan_symbols(keys, symbols, data_dir, progress, tail_tol, on_result)
+
+    elapsed = time.perf_counter() - t0
+    if verbose:
+        print(f"⚡ {len(keys)} tarama, {len(symbols)} hisse: {elapsed:.1f} sn (hata: {errors})")
+        for k in keys: print(f"   {SCANNERS[k][1]:<24} {len(results[k]):4d} sonuç  {timings[k]:6.1f} sn")
+        print(f"   {cache_summary()}")
+        print(f"   {indikator_onbellek.cache_summary()}")
+        print(f"   {indikator_durumu.summary()}")
+    if not report: return results
+    out = {}
+    for k in keys:
+        mod = load_scanner(k)
+        res = tarama_sonucu.ScanResult(k, mod.tables(results[k]), SCANNERS[k][1], index=getattr(mod, "INDEX_SHEETS", ()))
+        res.save(data_dir)
+        if getattr(mod, "HISTORY", None): tarama_gecmisi.record(res, mod.HISTORY, data_dir)
+        if excel: res.to_excel()
+        out[k] = res
+    if verbose:
+        for k, res in out.items(): print(f"   📄 {SCANNERS[k][1]:<24} {res.rows}  {res.excel or res.path}")
+    return out
+
+
+def _row_id(r):
+    return next(iter(r.values())) if isinstance(r, dict) and r else repr(r)
+
+
+def _same_value(a, b, rtol):
+    if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
+        return bool(np.isclose(a, b, rtol=rtol, atol=0, equal_nan=True))
+    return a == b
+
+
+def _diff_rows(full, tail, rtol):
+    """Tam geçmiş ve kuyruk sonuçları arasında farklı (eksik/fazla/değeri farklı) satır sayısı."""
+    a, b = {_row_id(r): r for r in full}, {_row_id(r): r for r in tail}
+    diff = len(a.keys() ^ b.keys())
+    for key in a.keys() & b.keys():
+        ra, rb = a[key], b[key]
+        if not isinstance(ra, dict): diff += ra != rb; continue
+        diff += ra.keys() != rb.keys() or not all(_same_value(ra[c], rb[c], rtol) for c in ra)
+    return diff
+
+
+def tail_report(keys=None, tol=1e-6, data_dir=DATA_DIR):
+    """warmup bildiren her tarayıcıyı tüm geçmiş ve kuyruk modunda çalıştırır;
+    kesilen bar sayısı, süreler, hızlanma ve farklı sonuç satırı sayısını yazar."""
+    mods = {k: load_scanner(k) for k in (keys or SCANNERS)}
+    mods = {k: m for k, m in mods.items() if hasattr(m, "warmup")}
+    tails = tail_lengths(mods, tol)
+    symbols = list_symbols(data_dir)
+    for k, mod in mods.items():  # ayrıştırma süresi ölçüme girmesin
+        for s in symbols: load_stock_df(s, data_dir, **getattr(mod, "LOAD_ARGS", {}))
+    print(f"Kuyruk modu, tolerans {tol:g}, {len(symbols)} hisse")
+    print(f"   {'Tarayıcı':<24} {'bar':>5} {'tam':>8} {'kuyruk':>8} {'hız':>6}  fark")
+    rows = {}
+    for k in mods:
+        full, t_full, _ = scan_symbols([k], symbols, data_dir, tail_tol=0)
+        tail, t_tail, _ = scan_symbols([k], symbols, data_dir, tail_tol=tol)
+        diff = _diff_rows(full[k], tail[k], max(tol, 1e-12))
+        rows[k] = {"bars": tails[k], "full": t_full[k], "tail": t_tail[k], "diff": diff}
+        print(f"   {SCANNERS[k][1]:<24} {tails[k]:5d} {t_full[k]:7.2f}s {t_tail[k]:7.2f}s "
+              f"x{t_full[k] / max(t_tail[k], 1e-9):4.1f}  {diff}/{len(full[k])}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tek süreçte çoklu tarama motoru")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_scan = sub.add_parser("scan", help="Tarayıcıları çalıştır")
+    p_scan.add_argument("scanners", nargs="*", help=f"Tarayıcı anahtarları: {', '.join(SCANNERS)}")
+    p_scan.add_argument("--all", action="store_true", help="Tüm tarayıcılar")
+    p_scan.add_argument("--workers", type=int, default=1, help="Süreç sayısı (çok çekirdekli makinede)")
+    p_scan.add_argument("--tail", type=float, default=None, metavar="TOL", help="Kuyruk modu toleransı (0: tüm geçmiş)")
+    p_scan.add_argument("--servis", action="store_true", help="Çalışan sıcak tarama servisine gönder (tarama_servisi.py)")
+    p_scan.add_argument("--excel", action="store_true", help="Excel raporlarını da yaz")
+    p_tail = sub.add_parser("tail", help="Kuyruk modunu tüm geçmişle karşılaştır (hız ve fark)")
+    p_tail.add_argument("scanners", nargs="*", help="Tarayıcı anahtarları (boşsa warmup bildirenlerin hepsi)")
+    p_tail.add_argument("--tol", type=float, default=1e-6, help="Göreli tolerans")
+    sub.add_parser("list", help="Tarayıcıları listele")
+    args = parser.parse_args()
+    if args.cmd == "list":
+        for k, (fname, name) in SCANNERS.items(): print(f"{k:<18} {name}")
+    elif args.cmd == "tail":
+        tail_report(args.scanners or None, args.tol)
+    else:
+        if not args.all and not args.scanners: parser.error("Tarayıcı adı veya --all verin")
+        keys = None if args.all else args.scanners
+        if args.servis:
+            import tarama_servisi
+            if tarama_servisi.available():
+                t0 = time.perf_counter()
+                out = tarama_servisi.scan(keys, tail_tol=args.tail, excel=args.excel)
+                print(f"⚡ Servis: {len(out)} tarama {time.perf_counter() - t0:.1f} sn")
+                for k, res in out.items(): print(f"   📄 {SCANNERS[k][1]:<24} {res.rows}  {res.excel or res.path}")
+                sys.exit(0)
+            print("⚠️ Tarama servisi çalışmıyor, bu süreçte taranıyor.")
+        run_scans(keys, workers=args.workers, tail_tol=args.tail, excel=args.excel)
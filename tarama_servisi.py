@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import stat
+import secrets
+import argparse
+import threading
+import subprocess
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- SICAK TARAMA SERVİSİ ---
+# Her tarama süreci Python açılışı + pandas/numpy/scipy/openpyxl içe aktarımı
+# ve hisse verisinin diskten okunmasıyla başlar. Servis bunları bir kez yapar:
+# kütüphaneler yüklü, tarayıcı modülleri derlenmiş, veri (yukleyici LRU) ve
+# indikatör durumları bellekte kalır. Panel ve CLI yerel soket üzerinden
+# (multiprocessing.connection, kimlik anahtarlı) tarama ister; yanıt olarak
+# tarama_motoru.run_scans'in döndürdüğü yapı (tarama_sonucu.ScanResult'lar
+# veya ham sonuç listeleri) pickle ile gelir. Tarama sırasında ilerleme ve kısmi sonuçlar akar.
+# Veri güncellenince yukleyici dosya damgasından yeniler; servisi yeniden
+# başlatmak gerekmez.
+# Mesajlar pickle olduğu için anahtarı bilen, servis kullanıcısı adına kod
+# çalıştırabilir. Anahtar sabit değildir: ilk start/serve'de secrets ile
+# üretilip DATA_DIR/KEY_FILE'a yalnızca sahibinin okuyabileceği (0600) izinle
+# yazılır; istemci oradan okur. Dosya yoksa veya başkalarınca okunabiliyorsa
+# servis açılmaz, istemci bağlanmaz.
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("TARAMA_SERVIS_PORT", "47291"))
+ADDRESS = (HOST, PORT)
+KEY_FILE = ".tarama_servisi.anahtar"
+KEY_BYTES = 32
+START_TIMEOUT = 120  # ısınma (tüm taramaların bir kez geçişi) dahil
+
+
+class ServiceError(Exception):
+    pass
+
+
+# ==================== KİMLİK ANAHTARI ====================
+def key_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, KEY_FILE)
+
+
+def _check_key_file(path):
+    if os.name == "nt": return  # izinler ACL ile; kullanıcı profili altındaki dosya yeterli
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise ServiceError(f"Anahtar dosyası güvensiz (sahibi başkası veya 0600 değil): {path}")
+
+
+def read_key(data_dir=DATA_DIR):
+    """İstemci anahtarı; dosya yoksa FileNotFoundError (servis hiç açılmamış)."""
+    path = key_path(data_dir)
+    with open(path, "rb") as fh: key = fh.read()
+    _check_key_file(path)
+    if len(key) < KEY_BYTES: raise ServiceError(f"Anahtar dosyası bozuk: {path}")
+    return key
+
+
+def server_key(data_dir=DATA_DIR):
+    """Servis anahtarı: yoksa rastgele üretip 0600 dosyaya yazar, varsa okur."""
+    os.makedirs(data_dir, exist_ok=True)
+    try:
+        fd = os.open(key_path(data_dir), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+    except FileExistsError: return read_key(data_dir)
+    key = secrets.token_bytes(KEY_BYTES)
+    with os.fdopen(fd, "wb") as fh: fh.write(key)
+    return key
+
+
+# ==================== SUNUCU ====================
+class ScanServer:
+    """Yerel soketten istek alan, kütüphaneleri ve veriyi sıcak tutan tarama süreci."""
+
+    def __init__(self, data_dir=DATA_DIR, address=ADDRESS):
+        self.data_dir, self.address = data_dir, address
+        self.authkey = server_key(data_dir)  # anahtar yoksa/güvensizse servis açılmaz
+        self.started = time.time()
+        self.warm_seconds = 0.0
+        self.scans = 0
+        self._scan_lock = threading.Lock()  # taramalar sırayla (durum dosyaları, tek çekirdek)
+        self._stop = threading.Event()
+
+    def warm(self, keys=None):
+        """Tarayıcıları yükler ve bir kez rapor yazmadan çalıştırır: veri, indikatör
+        önbelleği ve kalıcı durumlar belleğe gelir."""
+        import tarama_motoru
+        t0 = time.perf_counter()
+        tarama_motoru.run_scans(keys, self.data_dir, report=False, verbose=False)
+        self.warm_seconds = time.perf_counter() - t0
+        return self.warm_seconds
+
+    def serve(self):
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"🟢 Tarama servisi dinliyor: {self.address[0]}:{self.address[1]} (pid {os.getpid()})", flush=True)
+            while not self._stop.is_set():
+                try: conn = listener.accept()
+                except (AuthenticationError, EOFError, ConnectionError): continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        print("🔴 Tarama servisi durdu.", flush=True)
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                msg = conn.recv()
+                conn.send(("ok", self._dispatch(conn, msg)))
+            except (EOFError, ConnectionError, BrokenPipeError): return
+            except Exception as e:
+                try: conn.send(("error", f"{type(e).__name__}: {e}"))
+                except (ConnectionError, BrokenPipeError): pass
+        if self._stop.is_set():
+            # accept() bloklu; kendine bağlanıp döngüyü uyandır
+            try: Client(self.address, authkey=self.authkey).close()
+            except OSError: pass
+
+    def _dispatch(self, conn, msg):
+        op = msg.get("op")
+        if op == "ping": return self.status()
+        if op == "scan": return self._scan(conn, msg)
+        if op == "shutdown": self._stop.set(); return self.status()
+        raise ServiceError(f"Bilinmeyen istek: {op}")
+
+    def status(self):
+        import yukleyici, indikator_durumu
+        return {"pid": os.getpid(), "uptime": time.time() - self.started, "warm_seconds": self.warm_seconds,
+                "scans": self.scans, "cache": yukleyici.cache_summary(), "state": indikator_durumu.summary()}
+
+    def _scan(self, conn, msg):
+        import tarama_motoru
+        stream = msg.get("stream", False)
+        progress = (lambda i, n: conn.send(("progress", i, n))) if stream else None
+        on_result = (lambda k, r: conn.send(("result", k, r))) if stream else None
+        with self._scan_lock:
+            t0 = time.perf_counter()
+            out = tarama_motoru.run_scans(msg.get("keys"), self.data_dir, report=msg.get("report", True),
+                                          progress=progress, verbose=False, tail_tol=msg.get("tail_tol"),
+                                          on_result=on_result, excel=msg.get("excel", False))
+            self.scans += 1
+        return {"output": out, "elapsed": time.perf_counter() - t0}
+
+
+# ==================== İSTEMCİ ====================
+def request(msg, progress=None, on_result=None, address=ADDRESS):
+    """Servise tek istek; akış mesajlarını geri çağrılara dağıtır, yanıtı döner.
+    Servis yoksa (anahtar dosyası da yoksa) OSError yükselir."""
+    with Client(address, authkey=read_key()) as conn:
+        conn.send(msg)
+        while True:
+            kind, *rest = conn.recv()
+            if kind == "progress":
+                if progress: progress(*rest)
+            elif kind == "result":
+                if on_result: on_result(*rest)
+            elif kind == "ok": return rest[0]
+            else: raise ServiceError(rest[0])
+
+
+def available(address=ADDRESS):
+    try: request({"op": "ping"}, address=address); return True
+    except (OSError, EOFError, AuthenticationError, ServiceError): return False
+
+
+def scan(keys=None, report=True, tail_tol=None, progress=None, on_result=None, excel=False, address=ADDRESS):
+    """tarama_motoru.run_scans ile aynı dönüş, ama sıcak serviste çalışır."""
+    msg = {"op": "scan", "keys": list(keys) if keys else None, "report": report, "tail_tol": tail_tol,
+           "stream": bool(progress or on_result), "excel": excel}
+    return request(msg, progress, on_result, address)["output"]
+
+
+def start(timeout=START_TIMEOUT, warm=True):
+    """Servisi ayrık bir süreç olarak başlatır ve hazır olana kadar bekler (zaten çalışıyorsa dokunmaz)."""
+    if available(): return None
+    server_key()  # anahtar servis açılmadan önce hazır olsun (güvensizse burada durur)
+    cmd = [sys.executable, os.path.abspath(__file__), "serve"] + ([] if warm else ["--soguk"])
+    kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None: raise ServiceError(f"Servis açılamadı (çıkış kodu {proc.returncode})")
+        if available(): return proc
+        time.sleep(0.5)
+    raise ServiceError("Servis zamanında hazır olmadı")
+
+
+def stop():
+    try: return request({"op": "shutdown"})
+    except (OSError, EOFError, AuthenticationError, ServiceError): return None
+
+
+# ==================== ÖLÇÜM ====================
+def _cold_seconds(code):
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def benchmark(keys=None):
+    """Tarayıcı başına soğuk (yeni yorumlayıcı: açılış + içe aktarma + tarama) ve
+    sıcak (servise istek) gecikme. Servis çalışmıyorsa geçici olarak açılır."""
+    import tarama_motoru
+    keys = list(keys or tarama_motoru.SCANNERS)
+    owned = start()
+    try:
+        imports = _cold_seconds("import tarama_motoru")
+        print(f"Soğuk açılış (yorumlayıcı + import tarama_motoru): {imports:.2f} sn")
+        print(f"   {'Tarayıcı':<24} {'soğuk':>8} {'sıcak':>8} {'hız':>6}")
+        rows = {}
+        for k in keys:
+            cold = _cold_seconds(f"import tarama_motoru; tarama_motoru.run_scans([{k!r}], report=False, verbose=False)")
+            t0 = time.perf_counter()
+            scan([k], report=False)
+            warm = time.perf_counter() - t0
+            rows[k] = {"cold": cold, "warm": warm}
+            print(f"   {tarama_motoru.SCANNERS[k][1]:<24} {cold:7.2f}s {warm:7.2f}s x{cold / max(warm, 1e-9):5.1f}")
+        return rows
+    finally:
+        if owned: stop(); owned.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sıcak tarama servisi (yerel soket)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="Servisi bu süreçte çalıştır")
+    p_serve.add_argument("--soguk", action="store_true", help="Isınma taramasını atla")
+    sub.add_parser("start", help="Servisi arka planda başlat")
+    sub.add_parser("stop", help="Servisi durdur")
+    sub.add_parser("ping", help="Servis durumu")
+    p_scan = sub.add_parser("scan", help="Servise tarama gönder")
+    p_scan.add_argument("scanners", nargs="*", help="Tarayıcı anahtarları (boşsa hepsi)")
+    p_scan.add_argument("--tail", type=float, default=None, metavar="TOL", help="Kuyruk modu toleransı")
+    p_scan.add_argument("--excel", action="store_true", help="Excel raporlarını da yaz")
+    p_bench = sub.add_parser("bench", help="Soğuk ve sıcak gecikmeyi ölç")
+    p_bench.add_argument("scanners", nargs="*")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        server = ScanServer()
+        if not args.soguk: print(f"🔥 Isınma: {server.warm():.1f} sn", flush=True)
+        server.serve()
+    elif args.cmd == "start":
+        proc = start()
+        print("Servis zaten çalışıyor." if proc is None else f"Servis başladı (pid {proc.pid}).")
+    elif args.cmd == "stop":
+        print("Servis durduruldu." if stop() else "Servis çalışmıyor.")
+    elif args.cmd == "ping":
+        try: print(request({"op": "ping"}))
+        except OSError: print("Servis çalışmıyor.")
+    elif args.cmd == "scan":
+        t0 = time.perf_counter()
+        out = scan(args.scanners or None, tail_tol=args.tail, excel=args.excel,
+                   progress=lambda i, n: print(f"\r{i}/{n} hisse", end="", flush=True))
+        print(f"\n⚡ Servis: {time.perf_counter() - t0:.1f} sn")
+        for k, res in out.items(): print(f"   {k:<18} {res.rows}  {res.excel or res.path}")
+    else:
+        benchmark(args.scanners or None)
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import pickle
+import shutil
+import argparse
+from datetime import datetime
+import pandas as pd
+import excel_rapor
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- YAPILANDIRILMIŞ TARAMA SONUÇLARI ---
+# Tarayıcılar tablolarını {sayfa: DataFrame} olarak verir (tables(results)).
+# ScanResult bu tabloları bellekte taşır; panel ve servis doğrudan onu kullanır.
+# Kalıcı kopya DATA_DIR/RESULT_DIR/<tarayıcı>/<zaman>/ altına bir kez yazılır:
+# sayfa başına Parquet (pyarrow yazamazsa pickle) + manifest.json (tarayıcı,
+# zaman, sayfalar, satır/sütun sayıları, Excel yolu). Klasör önce gizli bir tmp
+# adla yazılıp os.replace ile yerine konur; eşzamanlı taramalar çakışmaz,
+# yarım sonuç okunmaz. Excel raporu isteğe bağlı ve tembel: to_excel()
+# (excel_rapor, tarayıcının REPORT_STYLE biçimleriyle).
+RESULT_DIR = ".sonuclar"
+RESULT_FORMAT = 1
+KEEP = 10  # tarayıcı başına saklanan son sonuç sayısı
+MANIFEST = "manifest.json"
+
+
+def export_excel(sheets, path, style=None, index=()):
+    """Tabloları Excel'e yazar; style: tarayıcının REPORT_STYLE'ı (renk/genişlik). Tablo yoksa None."""
+    if not sheets:
+        print("Sonuç bulunamadı.")
+        return None
+    excel_rapor.write_report(path, sheets, style, index)
+    print(f"✅ Rapor Kaydedildi: {path}")
+    return path
+
+
+def _write_sheet(df, base):
+    try:
+        df.to_parquet(base + ".parquet")
+        return os.path.basename(base) + ".parquet", "parquet"
+    except (ImportError, ValueError, TypeError):
+        # Karışık tipli sütunlar, sayı sütun adları vb. Parquet'e girmez
+        if os.path.exists(base + ".parquet"): os.remove(base + ".parquet")
+        with open(base + ".pkl", "wb") as fh: pickle.dump(df, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        return os.path.basename(base) + ".pkl", "pickle"
+
+
+def _read_sheet(path, fmt):
+    if fmt == "parquet": return pd.read_parquet(path)
+    with open(path, "rb") as fh: return pickle.load(fh)
+
+
+class ScanResult:
+    """Tek taramanın tabloları ve manifest bilgileri."""
+
+    def __init__(self, key, sheets, title=None, created=None, index=()):
+        self.key, self.title = key, title or key
+        self.created = created or datetime.now()
+        self.index = set(index) & set(sheets)  # Excel'e indeksiyle yazılacak sayfalar
+        self.sheets = {name: df if name in self.index else df.reset_index(drop=True) for name, df in sheets.items()}
+        self.path = None   # kayıt klasörü
+        self.excel = None  # dışa aktarılmış Excel yolu
+
+    def __repr__(self):
+        return f"ScanResult({self.key!r}, {self.created:%Y-%m-%d %H:%M:%S}, {self.rows})"
+
+    @property
+    def rows(self):
+        return {name: len(df) for name, df in self.sheets.items()}
+
+    @property
+    def total_rows(self):
+        return len(next(iter(self.sheets.values()))) if self.sheets else 0
+
+    def manifest(self, files=None):
+        files = files or {}
+        return {"format": RESULT_FORMAT, "scanner": self.key, "title": self.title,
+                "created": self.created.isoformat(timespec="microseconds"), "excel": self.excel,
+                "sheets": [{"name": name, "rows": len(df), "cols": len(df.columns), "index": name in self.index,
+                            **dict(zip(("file", "format"), files.get(name, (None, None))))}
+                           for name, df in self.sheets.items()]}
+
+    def save(self, data_dir=DATA_DIR, keep=KEEP):
+        """Sonucu kalıcı klasörüne bir kez yazar, eski sonuçları budar; klasörü döner."""
+        root = os.path.join(data_dir, RESULT_DIR, self.key)
+        os.makedirs(root, exist_ok=True)
+        name = self.created.strftime("%Y%m%d-%H%M%S-%f")
+        tmp = os.path.join(root, f".{name}.{os.getpid()}.tmp")
+        os.makedirs(tmp)
+        files = {sheet: _write_sheet(df, os.path.join(tmp, f"sayfa_{i:02d}"))
+                 for i, (sheet, df) in enumerate(self.sheets.items())}
+        with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as fh:
+            json.dump(self.manifest(files), fh, ensure_ascii=False, indent=1)
+        self.path = os.path.join(root, name)
+        os.replace(tmp, self.path)
+        for old in _result_dirs(root)[:-keep or None]: shutil.rmtree(old, ignore_errors=True)
+        return self.path
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as fh: m = json.load(fh)
+        sheets = {s["name"]: _read_sheet(os.path.join(path, s["file"]), s["format"]) for s in m["sheets"]}
+        res = cls(m["scanner"], sheets, m["title"], datetime.fromisoformat(m["created"]),
+                  [s["name"] for s in m["sheets"] if s["index"]])
+        res.path, res.excel = path, m.get("excel")
+        return res
+
+    def to_excel(self, path=None):
+        """Excel raporu (yoksa şimdi üretir); adı ve renkleri tarayıcının report_path/REPORT_STYLE'ından."""
+        if path is None and self.excel and os.path.exists(self.excel): return self.excel
+        import tarama_motoru
+        mod = tarama_motoru.load_scanner(self.key)
+        self.excel = export_excel(self.sheets, path or mod.report_path(self.created),
+                                  getattr(mod, "REPORT_STYLE", None), self.index)
+        if self.path and self.excel:
+            manifest = os.path.join(self.path, MANIFEST)
+            with open(manifest, encoding="utf-8") as fh: m = json.load(fh)
+            m["excel"] = self.excel
+            with open(manifest, "w", encoding="utf-8") as fh: json.dump(m, fh, ensure_ascii=False, indent=1)
+        return self.excel
+
+
+def _result_dirs(root):
+    if not os.path.isdir(root): return []
+    return [os.path.join(root, d) for d in sorted(os.listdir(root))
+            if not d.startswith(".") and os.path.exists(os.path.join(root, d, MANIFEST))]
+
+
+def history(key=None, data_dir=DATA_DIR):
+    """Kayıtlı sonuçların manifestleri (en yeni önce); her birinde 'path' de var."""
+    base = os.path.join(data_dir, RESULT_DIR)
+    keys = [key] if key else (sorted(os.listdir(base)) if os.path.isdir(base) else [])
+    out = []
+    for k in keys:
+        for path in _result_dirs(os.path.join(base, k)):
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as fh: out.append(dict(json.load(fh), path=path))
+    return sorted(out, key=lambda m: m["created"], reverse=True)
+
+
+def latest(key, data_dir=DATA_DIR):
+    """Tarayıcının en son kayıtlı sonucu (yoksa None)."""
+    dirs = _result_dirs(os.path.join(data_dir, RESULT_DIR, key))
+    return ScanResult.load(dirs[-1]) if dirs else None
+
+
+def clear(data_dir=DATA_DIR):
+    shutil.rmtree(os.path.join(data_dir, RESULT_DIR), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kayıtlı tarama sonuçları")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_list = sub.add_parser("list", help="Sonuçları listele")
+    p_list.add_argument("scanner", nargs="?")
+    p_excel = sub.add_parser("excel", help="Son sonucu Excel'e aktar")
+    p_excel.add_argument("scanners", nargs="+")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for m in history(args.scanner):
+            sheets = ", ".join(f"{s['name']}({s['rows']})" for s in m["sheets"]) or "-"
+            print(f"{m['created'][:19]}  {m['scanner']:<16} {sheets}")
+    else:
+        for key in args.scanners:
+            res = latest(key)
+            if res is None: print(f"{key}: kayıtlı sonuç yok"); continue
+            t0 = time.perf_counter()
+            res.to_excel()
+            print(f"   {time.perf_counter() - t0:.2f} sn")
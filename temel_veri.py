@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import fiyat_deposu
+import indirici
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+CACHE_FILE = "TEMEL_CACHE.json"
+EXPORT_FILE = "TEMEL_VERILER.xlsx"
+
+# --- ALAN BAŞINA GEÇERLİLİK SÜRESİ (TTL) ---
+# ticker.info tek çağrıda hepsini döndürür; bir hisse, gereken alanlarından
+# biri bile eskidiyse yeniden çekilir. FK, PD/DD ve piyasa değeri her gün
+# depodaki son kapanıştan hesaplanır (fiyat / hisse başı kâr vb.), bu yüzden
+# yavaş değişen tabanlar (EPS, defter değeri, hisse adedi) haftalık yeter.
+# Günlük alanlar (trailingPE...) yalnızca taban eksikse gerekir.
+# EPS ve defter değeri şirketin raporlama para birimindedir (financialCurrency);
+# TRY değilse TL fiyata bölünemez, FK ve PD/DD Yahoo'nun oranlarından alınır.
+# Hisse adedi birimsizdir, piyasa değeri her durumda fiyattan hesaplanır.
+GUN = 24 * 3600
+LOCAL_CURRENCY = "TRY"
+FIELD_TTL = {
+    "sector": 30 * GUN,
+    "financialCurrency": 30 * GUN,
+    "trailingEps": 7 * GUN,
+    "bookValue": 7 * GUN,
+    "sharesOutstanding": 7 * GUN,
+    "trailingPE": 1 * GUN,
+    "priceToBook": 1 * GUN,
+    "marketCap": 1 * GUN,
+}
+# Günlük alan -> yerine fiyattan hesaplanabildiği taban alan
+DERIVED_FROM = {"trailingPE": "trailingEps", "priceToBook": "bookValue", "marketCap": "sharesOutstanding"}
+CURRENCY_FIELDS = {"trailingEps", "bookValue"}  # raporlama para biriminde gelen tabanlar
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 4.0  # saniyede ticker.info isteği
+
+
+def cache_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, CACHE_FILE)
+
+
+def load_cache(data_dir=DATA_DIR):
+    """{hisse: {alan: [deger, cekilme_zamani]}} (dosya yoksa / bozuksa boş)."""
+    try:
+        with open(cache_path(data_dir), encoding='utf-8') as fh: return json.load(fh)
+    except (OSError, ValueError): return {}
+
+
+def save_cache(cache, data_dir=DATA_DIR):
+    # Geçici dosyaya yaz + os.replace: panel yarım dosya okumaz
+    path = cache_path(data_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding='utf-8') as fh: json.dump(cache, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def is_local(currency):
+    """Tabanlar TL fiyata bölünebilir mi (para birimi bilinmiyorsa TL varsayılır)."""
+    return currency in (None, LOCAL_CURRENCY)
+
+
+def required_fields(entry):
+    """Bu hisse için tazeliği aranan alanlar (taban varsa günlük oran gerekmez)."""
+    local = is_local(entry.get("financialCurrency", [None])[0])
+    fields = []
+    for f in FIELD_TTL:
+        base = DERIVED_FROM.get(f)
+        if base and entry.get(base, [None])[0] and (local or base not in CURRENCY_FIELDS): continue
+        fields.append(f)
+    return fields
+
+
+def stale_fields(entry, now=None):
+    now = time.time() if now is None else now
+    return [f for f in required_fields(entry) if f not in entry or now - entry[f][1] > FIELD_TTL[f]]
+
+
+def fetch_info(hisse):
+    import yfinance as yf  # ~0.9 sn; yalnızca indirirken gerekli
+    info = yf.Ticker(indirici.yahoo_symbol(hisse)).info
+    if not info: raise ValueError("Boş info")
+    return {f: info.get(f) for f in FIELD_TTL}
+
+
+def refresh(symbols, data_dir=DATA_DIR, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, force=False, verbose=True):
+    """Sadece süresi dolan hisselerin temel verisini paralel çeker, önbelleği günceller."""
+    cache = load_cache(data_dir)
+    now = time.time()
+    todo = [h for h in symbols if force or stale_fields(cache.get(h, {}), now)]
+    if verbose: print(f"📊 Temel veri: {len(symbols)} hisse, {len(todo)} tanesinin süresi dolmuş.")
+    if not todo: return cache
+
+    bucket = indirici.TokenBucket(rate)
+    def job(h):
+        bucket.acquire()
+        return fetch_info(h)
+
+    failures = {}
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(job, h): h for h in todo}
+        for fut in as_completed(futures):
+            h = futures[fut]
+            try: values = fut.result()
+            except Exception as e:
+                failures[h] = str(e)
+                continue
+            entry = cache.setdefault(h, {})
+            stamp = time.time()
+            for f, v in values.items():
+                # Kaynak bir alanı boş dönerse eski değeri koru, zamanı yine de yenile
+                # (Yahoo'da hiç olmayan alan hisseyi her koşuda yeniden çektirmesin)
+                entry[f] = [v if v is not None or f not in entry else entry[f][0], stamp]
+    save_cache(cache, data_dir)
+    if verbose: indirici.report(len(todo), failures, time.perf_counter() - t0)
+    return cache
+
+
+def _ratio(price, base, fallback, local=True):
+    if base and local: return price / base if base > 0 else 0
+    return fallback or 0
+
+
+def load_table(data_dir=DATA_DIR, symbols=None):
+    """Önbellek + depodaki son kapanışlardan TEMEL_VERILER tablosu
+    (Hisse, Fiyat, FK, PD_DD, Sektor, Piyasa_Degeri, Degisim_Yuzde)."""
+    cache = load_cache(data_dir)
+    legacy = os.path.join(data_dir, EXPORT_FILE)
+    if not cache and os.path.exists(legacy):
+        # Önbellek henüz oluşmadıysa eski FinDow çıktısını kullan
+        df = pd.read_excel(legacy)
+        return df if symbols is None else df[df['Hisse'].isin(symbols)].reset_index(drop=True)
+    rows = []
+    for h in (symbols if symbols is not None else sorted(cache)):
+        entry = cache.get(h)
+        arr = fiyat_deposu.load_array(h, data_dir)
+        if not entry or arr is None or arr["CLOSING_TL"].shape[0] == 0: continue
+        val = {f: entry.get(f, [None])[0] for f in FIELD_TTL}
+        close = np.asarray(arr["CLOSING_TL"][-2:], dtype=float)
+        price = close[-1]
+        daily_change = (close[-1] - close[-2]) / close[-2] * 100 if len(close) >= 2 else 0
+        local = is_local(val["financialCurrency"])
+        market_cap = price * val["sharesOutstanding"] if val["sharesOutstanding"] else (val["marketCap"] or 0)
+        rows.append({
+            'Hisse': h,
+            'Fiyat': round(price, 2),
+            'FK': round(_ratio(price, val["trailingEps"], val["trailingPE"], local), 2),
+            'PD_DD': round(_ratio(price, val["bookValue"], val["priceToBook"], local), 2),
+            'Sektor': val["sector"] or 'Diğer',
+            'Piyasa_Degeri': market_cap,
+            'Degisim_Yuzde': round(daily_change, 2)
+        })
+    return pd.DataFrame(rows, columns=['Hisse', 'Fiyat', 'FK', 'PD_DD', 'Sektor', 'Piyasa_Degeri', 'Degisim_Yuzde'])
+
+
+def export_xlsx(data_dir=DATA_DIR, symbols=None):
+    """Eski araçlar için tabloyu TEMEL_VERILER.xlsx olarak da yazar."""
+    df = load_table(data_dir, symbols)
+    if df.empty: return None
+    path = os.path.join(data_dir, EXPORT_FILE)
+    df.to_excel(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temel veri (ticker.info) önbelleği")
+    parser.add_argument("--force", action="store_true", help="Süresi dolmamışları da yeniden çek")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE)
+    args = parser.parse_args()
+    refresh(fiyat_deposu.list_symbols(DATA_DIR), workers=args.workers, rate=args.rate, force=args.force)
+    path = export_xlsx()
+    if path: print(f"📊 Temel Analiz Dosyası Oluşturuldu: {path}")
@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import fiyat_deposu
+
+# --- BULUT UYUMLU AYARLAR ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'DATAson')
+
+# --- ÖNBELLEK ---
+# Aynı süreçte birden fazla tarama (veya panelin her yeniden çizimi) aynı
+# hisseyi bir kez ayrıştırsın diye. Anahtar dosya yolu; kayıtta dosyanın
+# (mtime, boyut) bilgisi tutulur, dosya değişince kayıt geçersiz sayılır.
+CACHE_MAX_BYTES = int(os.environ.get("YUKLEYICI_MAX_MB", "512")) * 1024 * 1024
+
+_cache = OrderedDict()  # yol -> (mtime_ns, boyut, DataFrame, bayt)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def source_path(hisse, data_dir=DATA_DIR):
+    """read_prices ile aynı sıra: önce .npy, yoksa eski .xlsx (ikisi de yoksa None)."""
+    for ext in (fiyat_deposu.STORE_EXT, ".xlsx"):
+        path = fiyat_deposu.symbol_path(hisse, data_dir, ext)
+        if os.path.exists(path): return path
+    return None
+
+
+def _get(path, stamp):
+    with _lock:
+        item = _cache.get(path)
+        if item is None or item[:2] != stamp: return None
+        _cache.move_to_end(path)
+        _stats["hits"] += 1
+        return item[2]
+
+
+def _put(path, stamp, df):
+    size = int(df.memory_usage(index=True, deep=False).sum())
+    with _lock:
+        old = _cache.pop(path, None)
+        if old is not None: _stats["bytes"] -= old[3]
+        _stats["misses"] += 1
+        if size > CACHE_MAX_BYTES: return
+        _cache[path] = (stamp[0], stamp[1], df, size)
+        _stats["bytes"] += size
+        while _stats["bytes"] > CACHE_MAX_BYTES and _cache:
+            _, evicted = _cache.popitem(last=False)
+            _stats["bytes"] -= evicted[3]
+            _stats["evictions"] += 1
+
+
+def read_cached(hisse, data_dir=DATA_DIR):
+    """Normalize fiyat tablosu (DATE, OPEN_TL, HIGH_TL, LOW_TL, CLOSING_TL, VOLUME_TL;
+    tarihe göre sıralı, boş kapanışsız). Önbellekten gelen tabloyu paylaşır;
+    değiştirecek olan çağıran kopyasını almalıdır (load_stock_df bunu yapar)."""
+    path = source_path(hisse, data_dir)
+    if path is None: return None
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    df = _get(path, stamp)
+    if df is None:
+        df = fiyat_deposu.read_prices(hisse, data_dir)
+        if df is None: return None
+        df.attrs["symbol"] = hisse
+        df.attrs["version"] = stamp  # indikatör önbelleği anahtarı için veri sürümü
+        df.attrs["source"] = path  # kalıcı indikatör durumu bu dosyanın yanında tutulur
+        _put(path, stamp, df)
+    return df
+
+
+def load_stock_df(hisse, data_dir=DATA_DIR, min_bars=0, fill_from_close=()):
+    """Tüm taramaların ortak yükleyicisi.
+
+    min_bars: daha kısa seriler için None döner.
+    fill_from_close: eksikse kapanışla doldurulacak sütunlar (örn. HIGH_TL, LOW_TL).
+    Hata veya veri yoksa None döner.
+    """
+    try:
+        df = read_cached(hisse, data_dir)
+        if df is None or "CLOSING_TL" not in df.columns or len(df) < min_bars: return None
+        # Sığ kopya: sütun ekleme/yeniden adlandırma önbelleği bozmaz
+        df = df.copy(deep=False)
+        for c in fill_from_close:
+            if c not in df.columns: df[c] = df["CLOSING_TL"]
+        return df
+    except: return None
+
+
+def cache_info():
+    """İsabet/ıska sayıları, tutulan bayt ve kayıt sayısı."""
+    with _lock:
+        info = dict(_stats, entries=len(_cache), max_bytes=CACHE_MAX_BYTES)
+    total = info["hits"] + info["misses"]
+    info["hit_rate"] = info["hits"] / total if total else 0.0
+    return info
+
+
+def cache_summary():
+    i = cache_info()
+    return (f"Önbellek: {i['entries']} hisse, {i['bytes'] / 1024 / 1024:.1f}/{i['max_bytes'] / 1024 / 1024:.0f} MB, "
+            f"isabet {i['hits']}, ıska {i['misses']} (%{i['hit_rate'] * 100:.0f}), tahliye {i['evictions']}")
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0, evictions=0, bytes=0)
+
+
+if __name__ == "__main__":
+    # Tüm evreni iki kez yükle: ilk tur ayrıştırır, ikinci tur önbellekten gelir
+    symbols = fiyat_deposu.list_symbols(DATA_DIR)
+    for tur in (1, 2):
+        t0 = time.perf_counter()
+        for s in symbols: load_stock_df(s)
+        print(f"Tur {tur}: {len(symbols)} hisse {time.perf_counter() - t0:.3f} sn")
+    print(cache_summary())